@@ -0,0 +1,54 @@
+"""
+Migration to add a unique (name, category) index to the Class table
+Required by the atomic INSERT ... ON CONFLICT used when creating classes
+"""
+
+import sqlite3
+from pathlib import Path
+
+def migrate_class_unique():
+    """Add UNIQUE(name, category) index to the class table"""
+    db_path = Path("students.db")
+
+    if not db_path.exists():
+        print("Database file not found. Please run the application first to create the database.")
+        return False
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        # Existing duplicates would make the unique index creation fail
+        cursor.execute("""
+            SELECT name, category, COUNT(*) FROM class
+            GROUP BY name, category
+            HAVING COUNT(*) > 1
+        """)
+        duplicates = cursor.fetchall()
+        if duplicates:
+            print("❌ Duplicate classes found. Rename or remove them before migrating:")
+            for name, category, count in duplicates:
+                print(f"   {name} ({category}): {count} rows")
+            return False
+
+        cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_class_name_cat ON class(name, category)"
+        )
+        conn.commit()
+        print("✅ Added unique (name, category) index to Class table")
+        return True
+
+    except sqlite3.Error as e:
+        print(f"❌ Error during migration: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    print("🚀 Starting Class Unique Constraint Migration...")
+    success = migrate_class_unique()
+    if success:
+        print("🎉 Migration completed successfully!")
+    else:
+        print("💥 Migration failed!")
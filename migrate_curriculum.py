@@ -59,7 +59,7 @@ def add_sample_curriculum_data():
     print("🔄 Adding sample curriculum data...")
     
     try:
-        from services.db import get_session, Curriculum, Subject, Class, AcademicYear, GradingRubric
+        from services.db import get_session, Curriculum, LearningObjective, Subject, Class, AcademicYear, GradingRubric
         from sqlmodel import select
         from datetime import datetime
         import json
@@ -108,13 +108,24 @@ def add_sample_curriculum_data():
                 class_id=class_obj.id,
                 academic_year_id=academic_year.id,
                 description="A comprehensive mathematics curriculum for primary students",
-                learning_objectives=json.dumps(sample_objectives),
                 total_lessons=40,
                 duration_weeks=20,
                 created_by=1,  # Default admin user
                 status="active"
             )
             session.add(curriculum)
+            session.flush()
+            
+            session.add_all([
+                LearningObjective(
+                    curriculum_id=curriculum.id,
+                    objective_text=obj["text"],
+                    category=obj["category"],
+                    priority=obj["priority"],
+                    order_index=i
+                )
+                for i, obj in enumerate(sample_objectives)
+            ])
             session.commit()
             
             # Create sample grading rubric
@@ -0,0 +1,88 @@
+"""
+Migration to make LearningObjective the single store for curriculum objectives
+Backfills LearningObjective rows from the legacy Curriculum.learning_objectives JSON
+column, then drops that column
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+def migrate_curriculum_objectives():
+    """Move JSON curriculum objectives into the learningobjective table"""
+    db_path = Path("students.db")
+
+    if not db_path.exists():
+        print("Database file not found. Please run the application first to create the database.")
+        return False
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("PRAGMA table_info(curriculum)")
+        columns = [column[1] for column in cursor.fetchall()]
+
+        if 'learning_objectives' not in columns:
+            print("learning_objectives column already removed. Skipping.")
+            return True
+
+        # Only backfill curricula that have no normalized objectives yet
+        cursor.execute("""
+            SELECT c.id, c.learning_objectives FROM curriculum c
+            WHERE NOT EXISTS (
+                SELECT 1 FROM learningobjective lo WHERE lo.curriculum_id = c.id
+            )
+        """)
+        backfilled = 0
+        now = datetime.utcnow()
+        for curriculum_id, payload in cursor.fetchall():
+            try:
+                objectives = json.loads(payload) if payload else []
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping unreadable objectives for curriculum {curriculum_id}")
+                continue
+
+            cursor.executemany(
+                """
+                INSERT INTO learningobjective
+                    (curriculum_id, objective_text, category, priority, order_index, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        curriculum_id,
+                        obj.get('text', ''),
+                        obj.get('category', 'knowledge'),
+                        obj.get('priority', 'medium'),
+                        i,
+                        now,
+                    )
+                    for i, obj in enumerate(objectives)
+                ]
+            )
+            backfilled += len(objectives)
+
+        print(f"✅ Backfilled {backfilled} learning objective(s)")
+
+        cursor.execute("ALTER TABLE curriculum DROP COLUMN learning_objectives")
+        print("✅ Dropped learning_objectives column from Curriculum table")
+
+        conn.commit()
+        return True
+
+    except sqlite3.Error as e:
+        print(f"❌ Error during migration: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    print("🚀 Starting Curriculum Objectives Migration...")
+    success = migrate_curriculum_objectives()
+    if success:
+        print("🎉 Migration completed successfully!")
+    else:
+        print("💥 Migration failed!")
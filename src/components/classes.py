@@ -1,6 +1,9 @@
+from collections import Counter, defaultdict
 import streamlit as st
-from services.db import get_session, Class, Teacher
+from services.db import get_session, Class, Teacher, Student
 from sqlmodel import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
 from utils.rbac import require_permission
 
 
@@ -43,22 +46,24 @@ def class_form():
     
     if submitted and class_name:
         with get_session() as session:
-            # Check if class already exists
-            existing = session.exec(
-                select(Class).where(Class.name == class_name, Class.category == category)
-            ).first()
-            
-            if existing:
-                st.error(f"Class '{class_name}' already exists in {category}")
-            else:
-                new_class = Class(
+            # Single atomic insert; the (name, category) unique constraint rejects duplicates
+            stmt = (
+                insert(Class)
+                .values(
                     name=class_name,
                     category=category,
                     description=description or None,
                     teacher_id=selected_teacher.id if selected_teacher else None
                 )
-                session.add(new_class)
-                session.commit()
+                .on_conflict_do_nothing(index_elements=["name", "category"])
+                .returning(Class.id)
+            )
+            created = session.exec(stmt).first()
+            session.commit()
+            
+            if created is None:
+                st.error(f"Class '{class_name}' already exists in {category}")
+            else:
                 teacher_info = f" (Teacher: {selected_teacher.first_name} {selected_teacher.last_name})" if selected_teacher else ""
                 st.success(f"Class '{class_name}' added to {category}{teacher_info}")
     elif submitted:
@@ -68,9 +73,15 @@ def class_form():
 def display_classes():
     st.header("Existing Classes")
     
+    # Read-only listing: fetch plain row tuples instead of hydrating ORM instances
     with get_session() as session:
-        classes = session.exec(select(Class).order_by(Class.category, Class.name)).all()
-        teachers = session.exec(select(Teacher)).all()
+        classes = session.exec(
+            select(Class.id, Class.name, Class.category, Class.description, Class.teacher_id)
+            .order_by(Class.category, Class.name)
+        ).all()
+        teachers = session.exec(
+            select(Teacher.id, Teacher.first_name, Teacher.last_name, Teacher.subject_specialization)
+        ).all()
         teacher_map = {t.id: t for t in teachers}
     
     if not classes:
@@ -78,10 +89,8 @@ def display_classes():
         return
     
     # Group classes by category
-    categories = {}
+    categories = defaultdict(list)
     for cls in classes:
-        if cls.category not in categories:
-            categories[cls.category] = []
         categories[cls.category].append(cls)
     
     # Display classes by category
@@ -192,10 +201,16 @@ def edit_class_teacher(cls, teacher_map):
                     teacher_name = f"{selected_teacher.first_name} {selected_teacher.last_name}" if selected_teacher else "No teacher"
 
                 # Update the class category and teacher
-                cls.teacher_id = new_teacher_id
-                cls.category = selected_category
-                session.add(cls)
-                session.commit()
+                class_obj = session.get(Class, cls.id)
+                class_obj.teacher_id = new_teacher_id
+                class_obj.category = selected_category
+                session.add(class_obj)
+                try:
+                    session.commit()
+                except IntegrityError:
+                    session.rollback()
+                    st.error(f"Class '{cls.name}' already exists in {selected_category}")
+                    return
                 
                 # Clear the edit state
                 st.session_state[f"edit_class_{cls.id}"] = False
@@ -213,7 +228,6 @@ def delete_class(class_id: int, class_name: str):
     """Delete a class after confirmation"""
     with get_session() as session:
         # Check if any students are assigned to this class
-        from services.db import Student
         students_in_class = session.exec(select(Student).where(Student.class_id == class_id)).all()
         
         if students_in_class:
@@ -232,24 +246,20 @@ def class_statistics():
     st.header("Class Statistics")
     
     with get_session() as session:
-        classes = session.exec(select(Class)).all()
-        teachers = session.exec(select(Teacher)).all()
-        teacher_map = {t.id: t for t in teachers}
+        # One LEFT JOIN yields each class with its teacher's name (None when unassigned)
+        classes = session.exec(
+            select(Class.id, Class.name, Class.category, Class.teacher_id, Teacher.first_name, Teacher.last_name)
+            .join(Teacher, Class.teacher_id == Teacher.id, isouter=True)
+            .order_by(Class.category, Class.name)
+        ).all()
         
         if not classes:
             st.info("No classes to display statistics for.")
             return
         
         # Count by category
-        category_counts = {}
-        classes_with_teachers = 0
-        for cls in classes:
-            if cls.category not in category_counts:
-                category_counts[cls.category] = 0
-            category_counts[cls.category] += 1
-            
-            if cls.teacher_id:
-                classes_with_teachers += 1
+        category_counts = Counter(cls.category for cls in classes)
+        classes_with_teachers = sum(1 for cls in classes if cls.teacher_id)
         
         # Display statistics
         col1, col2, col3, col4, col5 = st.columns(5)
@@ -272,26 +282,14 @@ def class_statistics():
         # Teacher assignment overview
         st.subheader("Teacher Assignments")
         
-        classes_with_teachers_list = []
-        classes_without_teachers_list = []
-        
-        for cls in classes:
-            if cls.teacher_id and cls.teacher_id in teacher_map:
-                teacher = teacher_map[cls.teacher_id]
-                classes_with_teachers_list.append({
-                    "class": cls,
-                    "teacher": teacher
-                })
-            else:
-                classes_without_teachers_list.append(cls)
+        classes_with_teachers_list = [cls for cls in classes if cls.first_name is not None]
+        classes_without_teachers_list = [cls for cls in classes if cls.first_name is None]
         
         # Show classes with teachers
         if classes_with_teachers_list:
             st.write("**Classes with Assigned Teachers:**")
-            for item in classes_with_teachers_list:
-                cls = item["class"]
-                teacher = item["teacher"]
-                st.write(f"• **{cls.name}** ({cls.category}) → {teacher.first_name} {teacher.last_name}")
+            for cls in classes_with_teachers_list:
+                st.write(f"• **{cls.name}** ({cls.category}) → {cls.first_name} {cls.last_name}")
         
         # Show classes without teachers
         if classes_without_teachers_list:
@@ -300,27 +298,20 @@ def class_statistics():
                 st.write(f"• **{cls.name}** ({cls.category})")
         
         # Student count per class (if students exist)
-        try:
-            from services.db import Student
-            students = session.exec(select(Student)).all()
+        students = session.exec(select(Student.class_id)).all()
+        
+        if students:
+            st.subheader("Students per Class")
             
-            if students:
-                st.subheader("Students per Class")
-                
-                class_student_counts = {}
-                for student in students:
-                    class_obj = session.get(Class, student.class_id)
-                    if class_obj:
-                        class_name = f"{class_obj.name} ({class_obj.category})"
-                        if class_name not in class_student_counts:
-                            class_student_counts[class_name] = 0
-                        class_student_counts[class_name] += 1
-                
-                if class_student_counts:
-                    for class_name, count in sorted(class_student_counts.items()):
-                        st.write(f"• **{class_name}**: {count} student(s)")
-                else:
-                    st.info("No students assigned to classes yet.")
-        except Exception:
-            # Handle case where Student table doesn't exist yet
-            pass
+            class_labels = {cls.id: f"{cls.name} ({cls.category})" for cls in classes}
+            class_student_counts = Counter(
+                class_labels[class_id]
+                for class_id in students
+                if class_id in class_labels
+            )
+            
+            if class_student_counts:
+                for class_name, count in sorted(class_student_counts.items()):
+                    st.write(f"• **{class_name}**: {count} student(s)")
+            else:
+                st.info("No students assigned to classes yet.")
@@ -1,16 +1,166 @@
 import streamlit as st
 import pandas as pd
 import json
+import math
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from services.db import (
     get_session, Curriculum, Assignment, GradingRubric, StudentAssignment, 
     ContinuousAssessment, LearningObjective, Student, Subject, Class, AcademicYear
 )
-from sqlmodel import select
+from sqlmodel import select, func
+from sqlalchemy import case, insert
 from utils.rbac import get_current_user, has_permission
 
 
+# Cached reference data for form dropdowns. Streamlit reruns the whole script on
+# every widget interaction, so these lookups are served from cache between changes.
+# Only the columns the dropdowns display are selected, returned as lightweight rows.
+
+_OPTION_QUERIES = {
+    "subjects": select(Subject.id, Subject.name, Subject.code),
+    "classes": select(Class.id, Class.name, Class.category),
+    "academic_years": select(AcademicYear.id, AcademicYear.year),
+    "curriculums": select(Curriculum.id, Curriculum.name),
+    "rubrics": select(GradingRubric.id, GradingRubric.name),
+}
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_options(*kinds: str) -> tuple:
+    """Load the dropdown rows for each of `kinds` back-to-back on one session"""
+    with get_session() as session:
+        return tuple(list(session.exec(_OPTION_QUERIES[kind]).all()) for kind in kinds)
+
+
+def _load_subjects() -> List:
+    """Load (id, name, code) rows for all subjects"""
+    return _load_options("subjects")[0]
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _parse_json_field(row_id: int, updated_at: datetime, payload: str) -> List[Dict]:
+    """Parse a JSON text column once per row version instead of on every rerun"""
+    return json.loads(payload)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _search_students(query: str, limit: int = 50) -> List:
+    """Load up to `limit` (id, first_name, last_name) rows whose full name matches `query`"""
+    full_name = Student.first_name + " " + Student.last_name
+    # Match typed % and _ literally rather than as LIKE wildcards
+    pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    with get_session() as session:
+        return list(session.exec(
+            select(Student.id, Student.first_name, Student.last_name)
+            .where(full_name.ilike(f"%{pattern}%", escape="\\"))
+            .order_by(Student.first_name, Student.last_name)
+            .limit(limit)
+        ).all())
+
+
+# Submission statuses that count towards an assignment's completion rate
+_DONE_STATUSES = frozenset({"submitted", "graded", "returned"})
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _analytics_data():
+    """Load the columns the assessment analytics tab aggregates over"""
+    with get_session() as session:
+        # Per-assignment totals and completed submissions in one aggregate query
+        completion_df = pd.read_sql(
+            select(
+                Assignment.title.label("Assignment"),
+                func.count(StudentAssignment.id).label("Total Students"),
+                func.count(case((StudentAssignment.status.in_(_DONE_STATUSES), 1))).label("Submitted"),
+            )
+            .join(StudentAssignment, StudentAssignment.assignment_id == Assignment.id, isouter=True)
+            .group_by(Assignment.id)
+            .order_by(Assignment.id),
+            session.connection()
+        )
+        assessments = list(session.exec(
+            select(ContinuousAssessment.level, ContinuousAssessment.competency)
+        ).all())
+    return completion_df, assessments
+
+
+PAGE_SIZE = 25
+
+
+def _paginate(total: int, key: str, page_size: int = PAGE_SIZE) -> int:
+    """Render a page selector for `total` rows and return the offset of the selected page"""
+    pages = max(1, math.ceil(total / page_size))
+    if pages == 1:
+        return 0
+    page = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, value=1, step=1, key=key)
+    st.caption(f"Showing {min(page_size, total - (page - 1) * page_size)} of {total}")
+    return (page - 1) * page_size
+
+
+# Abandoned form drafts are dropped from session_state after this many idle seconds
+FORM_STATE_TTL = 30 * 60
+MAX_TEXT_CHARS = 500
+
+
+def _touch_form(form: str):
+    """Record activity on a draft form so its session_state is kept"""
+    st.session_state[f"_form_touched_at_{form}"] = time.time()
+
+
+def _expire_form_state(form: str, keys: List[str], ttl: int = FORM_STATE_TTL):
+    """Drop a draft form's session_state entries once it has been idle longer than `ttl`"""
+    touched_key = f"_form_touched_at_{form}"
+    touched_at = st.session_state.setdefault(touched_key, time.time())
+    if time.time() - touched_at > ttl:
+        for key in keys:
+            st.session_state.pop(key, None)
+        _touch_form(form)
+
+
+OBJECTIVE_COLUMNS = ["text", "category", "priority"]
+OBJECTIVE_CATEGORIES = ["knowledge", "comprehension", "application", "analysis", "synthesis", "evaluation"]
+PRIORITY_LEVELS = ["high", "medium", "low"]
+RUBRIC_LEVELS = ["excellent", "good", "satisfactory", "needs_improvement"]
+CRITERIA_COLUMNS = ["name", "description", "weight"] + RUBRIC_LEVELS
+
+
+def _objectives_from_editor(edited: pd.DataFrame) -> List[Dict]:
+    """Convert the objectives editor table into objective dicts, skipping blank rows"""
+    edited = edited.dropna(subset=["text"])
+    edited = edited[edited["text"].str.strip() != ""]
+    return edited.fillna({"category": "knowledge", "priority": "medium"}).to_dict("records")
+
+
+def _criteria_to_frame(criteria: List[Dict]) -> pd.DataFrame:
+    """Flatten rubric criteria (with nested performance levels) into editor rows"""
+    rows = [
+        {"name": c["name"], "description": c["description"], "weight": c["weight"], **c["levels"]}
+        for c in criteria
+    ]
+    return pd.DataFrame(rows, columns=CRITERIA_COLUMNS)
+
+
+def _criteria_from_editor(edited: pd.DataFrame) -> List[Dict]:
+    """Convert the criteria editor table back into rubric criterion dicts"""
+    edited = edited.dropna(subset=["name"])
+    edited = edited[edited["name"].str.strip() != ""].fillna({
+        "description": "", "weight": 25,
+        "excellent": 4, "good": 3, "satisfactory": 2, "needs_improvement": 1
+    })
+    return [
+        {
+            "name": row["name"],
+            "description": row["description"],
+            "weight": int(row["weight"]),
+            "levels": {level: int(row[level]) for level in RUBRIC_LEVELS}
+        }
+        for row in edited.to_dict("records")
+    ]
+
+
 def render_curriculum_management():
     """Main curriculum management interface"""
     st.header("📚 Curriculum & Assessment Management")
@@ -74,11 +224,8 @@ def create_curriculum_form():
     """Form to create a new curriculum"""
     st.subheader("Create New Curriculum")
     
-    with get_session() as session:
-        # Get subjects and classes for dropdowns
-        subjects = session.exec(select(Subject)).all()
-        classes = session.exec(select(Class)).all()
-        academic_years = session.exec(select(AcademicYear)).all()
+    # Get subjects and classes for dropdowns
+    subjects, classes, academic_years = _load_options("subjects", "classes", "academic_years")
     
     if not subjects or not classes or not academic_years:
         st.warning("Please ensure you have subjects, classes, and academic years set up first.")
@@ -102,48 +249,33 @@ def create_curriculum_form():
     st.subheader("Learning Objectives")
     
     # Use session state to manage objectives
+    _expire_form_state("curriculum", ["objectives", "obj_editor"])
     if 'objectives' not in st.session_state:
         st.session_state.objectives = []
     
-    # Add objective form
-    with st.expander("➕ Add Learning Objective"):
-        obj_col1, obj_col2, obj_col3 = st.columns([3, 1, 1])
-        
-        with obj_col1:
-            obj_text = st.text_area("Objective", placeholder="Students will be able to...", key="new_objective")
-        
-        with obj_col2:
-            obj_category = st.selectbox("Category", [
-                "Knowledge", "Comprehension", "Application", 
-                "Analysis", "Synthesis", "Evaluation"
-            ], key="obj_category")
-        
-        with obj_col3:
-            obj_priority = st.selectbox("Priority", ["High", "Medium", "Low"], key="obj_priority")
-        
-        if st.button("Add Objective"):
-            if obj_text:
-                st.session_state.objectives.append({
-                    "text": obj_text,
-                    "category": obj_category.lower(),
-                    "priority": obj_priority.lower()
-                })
-                st.rerun()
-    
-    # Display current objectives
-    if st.session_state.objectives:
-        st.write("**Current Objectives:**")
-        for i, obj in enumerate(st.session_state.objectives):
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.write(f"{i+1}. {obj['text']} *({obj['category']}, {obj['priority']} priority)*")
-            with col2:
-                if st.button(f"Remove", key=f"remove_obj_{i}"):
-                    st.session_state.objectives.pop(i)
-                    st.rerun()
+    # Objectives are edited in a single table; rows are added and removed in place
+    st.caption("Add a row per objective. Select rows and press Delete to remove them.")
+    edited_objectives = st.data_editor(
+        pd.DataFrame(st.session_state.objectives, columns=OBJECTIVE_COLUMNS),
+        num_rows="dynamic",
+        use_container_width=True,
+        key="obj_editor",
+        on_change=_touch_form,
+        args=("curriculum",),
+        column_config={
+            "text": st.column_config.TextColumn("Objective", required=True, max_chars=MAX_TEXT_CHARS),
+            "category": st.column_config.SelectboxColumn(
+                "Category", options=OBJECTIVE_CATEGORIES, default="knowledge", required=True
+            ),
+            "priority": st.column_config.SelectboxColumn(
+                "Priority", options=PRIORITY_LEVELS, default="medium", required=True
+            ),
+        }
+    )
     
     # Submit form
     if st.button("Create Curriculum", type="primary"):
+        st.session_state.objectives = _objectives_from_editor(edited_objectives)
         if name and subject and class_obj and academic_year:
             user = get_current_user()
             
@@ -155,30 +287,32 @@ def create_curriculum_form():
                     class_id=class_obj.id,
                     academic_year_id=academic_year.id,
                     description=description,
-                    learning_objectives=json.dumps(st.session_state.objectives),
                     total_lessons=total_lessons,
                     duration_weeks=duration_weeks,
                     created_by=user['id'],
                     status="draft"
                 )
                 session.add(curriculum)
-                session.commit()
+                session.flush()
                 
-                # Create learning objectives
-                for i, obj in enumerate(st.session_state.objectives):
-                    learning_obj = LearningObjective(
+                # Objectives are stored only as LearningObjective rows
+                session.add_all([
+                    LearningObjective(
                         curriculum_id=curriculum.id,
                         objective_text=obj['text'],
                         category=obj['category'],
                         priority=obj['priority'],
                         order_index=i
                     )
-                    session.add(learning_obj)
-                
+                    for i, obj in enumerate(st.session_state.objectives)
+                ])
                 session.commit()
             
+            _load_options.clear()
             st.success(f"Curriculum '{name}' created successfully!")
             st.session_state.objectives = []  # Clear objectives
+            st.session_state.pop("obj_editor", None)
+            st.session_state.pop("_form_touched_at_curriculum", None)
             st.rerun()
         else:
             st.error("Please fill in all required fields")
@@ -188,8 +322,7 @@ def edit_curriculum_form():
     """Form to edit existing curriculum"""
     st.subheader("Edit Curriculum")
     
-    with get_session() as session:
-        curriculums = session.exec(select(Curriculum)).all()
+    curriculums = _load_options("curriculums")[0]
     
     if not curriculums:
         st.info("No curriculums available to edit.")
@@ -212,32 +345,36 @@ def display_curriculums():
     st.subheader("Existing Curriculums")
     
     with get_session() as session:
-        # Get all curriculums with related data
-        curriculums = session.exec(select(Curriculum)).all()
+        total = session.exec(select(func.count()).select_from(Curriculum)).one()
         
-        if not curriculums:
+        if not total:
             st.info("No curriculums created yet. Create your first curriculum using the form above.")
             return
         
-        subjects = {s.id: s for s in session.exec(select(Subject)).all()}
-        classes = {c.id: c for c in session.exec(select(Class)).all()}
-        academic_years = {a.id: a for a in session.exec(select(AcademicYear)).all()}
+        offset = _paginate(total, "curriculum_page")
+        
+        # Get one page of curriculums with their subject, class and year names in one query
+        curriculums = session.exec(
+            select(Curriculum, Subject.name, Class.name, AcademicYear.year)
+            .join(Subject, Subject.id == Curriculum.subject_id, isouter=True)
+            .join(Class, Class.id == Curriculum.class_id, isouter=True)
+            .join(AcademicYear, AcademicYear.id == Curriculum.academic_year_id, isouter=True)
+            .order_by(Curriculum.created_at.desc(), Curriculum.id.desc())
+            .offset(offset)
+            .limit(PAGE_SIZE)
+        ).all()
     
     # Create curriculum cards
-    for curriculum in curriculums:
-        subject = subjects.get(curriculum.subject_id)
-        class_obj = classes.get(curriculum.class_id)
-        academic_year = academic_years.get(curriculum.academic_year_id)
-        
+    for curriculum, subject_name, class_name, academic_year in curriculums:
         with st.container():
             st.markdown("---")
             col1, col2, col3 = st.columns([3, 1, 1])
             
             with col1:
                 st.subheader(curriculum.name)
-                st.write(f"**Subject:** {subject.name if subject else 'Unknown'}")
-                st.write(f"**Class:** {class_obj.name if class_obj else 'Unknown'}")
-                st.write(f"**Academic Year:** {academic_year.year if academic_year else 'Unknown'}")
+                st.write(f"**Subject:** {subject_name or 'Unknown'}")
+                st.write(f"**Class:** {class_name or 'Unknown'}")
+                st.write(f"**Academic Year:** {academic_year or 'Unknown'}")
                 if curriculum.description:
                     st.write(f"**Description:** {curriculum.description}")
             
@@ -256,35 +393,29 @@ def display_curriculums():
 def display_curriculum_details(curriculum_id: int):
     """Display detailed curriculum information"""
     with get_session() as session:
-        curriculum = session.get(Curriculum, curriculum_id)
-        objectives = session.exec(
-            select(LearningObjective).where(LearningObjective.curriculum_id == curriculum_id)
+        # Curriculum and its objectives in a single round-trip
+        rows = session.exec(
+            select(Curriculum, LearningObjective)
+            .join(LearningObjective, LearningObjective.curriculum_id == Curriculum.id, isouter=True)
+            .where(Curriculum.id == curriculum_id)
+            .order_by(LearningObjective.order_index)
         ).all()
     
+    curriculum = rows[0][0] if rows else None
+    objectives = [obj for _, obj in rows if obj is not None]
+    
     if not curriculum:
         st.error("Curriculum not found")
         return
     
     st.subheader(f"Curriculum Details: {curriculum.name}")
     
-    # Parse learning objectives
-    try:
-        objectives_data = json.loads(curriculum.learning_objectives) if curriculum.learning_objectives else []
-    except:
-        objectives_data = []
-    
     # Display objectives
-    if objectives_data or objectives:
+    if objectives:
         st.subheader("Learning Objectives")
         
-        # Show objectives from JSON (legacy)
-        for i, obj in enumerate(objectives_data):
-            st.write(f"{i+1}. {obj.get('text', '')}")
-            st.caption(f"Category: {obj.get('category', '').title()}, Priority: {obj.get('priority', '').title()}")
-        
-        # Show objectives from database
-        for obj in objectives:
-            st.write(f"• {obj.objective_text}")
+        for i, obj in enumerate(objectives):
+            st.write(f"{i+1}. {obj.objective_text}")
             st.caption(f"Category: {obj.category.title()}, Priority: {obj.priority.title()}")
 
 
@@ -311,11 +442,7 @@ def create_assignment_form():
     """Form to create a new assignment"""
     st.subheader("Create New Assignment")
     
-    with get_session() as session:
-        subjects = session.exec(select(Subject)).all()
-        classes = session.exec(select(Class)).all()
-        rubrics = session.exec(select(GradingRubric)).all()
-        curriculums = session.exec(select(Curriculum)).all()
+    subjects, classes, rubrics, curriculums = _load_options("subjects", "classes", "rubrics", "curriculums")
     
     if not subjects or not classes:
         st.warning("Please ensure you have subjects and classes set up first.")
@@ -374,21 +501,23 @@ def create_assignment_form():
                 session.commit()
                 
                 # Create student assignments for all students in the class
-                students = session.exec(
-                    select(Student).where(Student.class_id == class_obj.id)
+                student_ids = session.exec(
+                    select(Student.id).where(Student.class_id == class_obj.id)
                 ).all()
                 
-                for student in students:
-                    student_assignment = StudentAssignment(
-                        assignment_id=assignment.id,
-                        student_id=student.id,
-                        status="assigned"
+                if student_ids:
+                    session.exec(
+                        insert(StudentAssignment),
+                        params=[
+                            {"assignment_id": assignment.id, "student_id": student_id, "status": "assigned"}
+                            for student_id in student_ids
+                        ]
                     )
-                    session.add(student_assignment)
                 
                 session.commit()
             
-            st.success(f"Assignment '{title}' created and distributed to {len(students)} students!")
+            _analytics_data.clear()
+            st.success(f"Assignment '{title}' created and distributed to {len(student_ids)} students!")
             st.rerun()
         else:
             st.error("Please fill in all required fields")
@@ -398,46 +527,61 @@ def display_assignments():
     """Display existing assignments"""
     st.subheader("Assignment Overview")
     
-    with get_session() as session:
-        assignments = session.exec(select(Assignment)).all()
-        
-        if not assignments:
-            st.info("No assignments created yet.")
-            return
-        
-        subjects = {s.id: s for s in session.exec(select(Subject)).all()}
-        classes = {c.id: c for c in session.exec(select(Class)).all()}
-    
     # Filter options
     col1, col2, col3 = st.columns(3)
     with col1:
-        filter_subject = st.selectbox("Filter by Subject", ["All"] + [s.name for s in subjects.values()])
+        filter_subject = st.selectbox("Filter by Subject", ["All"] + [s.name for s in _load_subjects()])
     with col2:
         filter_type = st.selectbox("Filter by Type", ["All", "homework", "project", "quiz", "test", "essay"])
     with col3:
         filter_status = st.selectbox("Filter by Status", ["All", "active", "draft", "closed", "archived"])
     
-    # Display assignments
-    for assignment in assignments:
-        subject = subjects.get(assignment.subject_id)
-        class_obj = classes.get(assignment.class_id)
+    # Apply filters in the WHERE clause so only matching rows are read
+    conditions = []
+    if filter_subject != "All":
+        conditions.append(Subject.name == filter_subject)
+    if filter_type != "All":
+        conditions.append(Assignment.assignment_type == filter_type)
+    if filter_status != "All":
+        conditions.append(Assignment.status == filter_status)
+    
+    with get_session() as session:
+        total = session.exec(
+            select(func.count())
+            .select_from(Assignment)
+            .join(Subject, Subject.id == Assignment.subject_id, isouter=True)
+            .where(*conditions)
+        ).one()
         
-        # Apply filters
-        if filter_subject != "All" and (not subject or subject.name != filter_subject):
-            continue
-        if filter_type != "All" and assignment.assignment_type != filter_type:
-            continue
-        if filter_status != "All" and assignment.status != filter_status:
-            continue
+        if not total:
+            if conditions:
+                st.info("No assignments match the selected filters.")
+            else:
+                st.info("No assignments created yet.")
+            return
         
+        offset = _paginate(total, "assignment_page")
+        
+        assignments = session.exec(
+            select(Assignment, Subject.name, Class.name)
+            .join(Subject, Subject.id == Assignment.subject_id, isouter=True)
+            .join(Class, Class.id == Assignment.class_id, isouter=True)
+            .where(*conditions)
+            .order_by(Assignment.created_at.desc(), Assignment.id.desc())
+            .offset(offset)
+            .limit(PAGE_SIZE)
+        ).all()
+    
+    # Display one page of assignments
+    for assignment, subject_name, class_name in assignments:
         with st.container():
             st.markdown("---")
             col1, col2, col3 = st.columns([3, 1, 1])
             
             with col1:
                 st.subheader(assignment.title)
-                st.write(f"**Subject:** {subject.name if subject else 'Unknown'}")
-                st.write(f"**Class:** {class_obj.name if class_obj else 'Unknown'}")
+                st.write(f"**Subject:** {subject_name or 'Unknown'}")
+                st.write(f"**Class:** {class_name or 'Unknown'}")
                 st.write(f"**Type:** {assignment.assignment_type.title()}")
                 st.write(f"**Description:** {assignment.description[:100]}...")
             
@@ -461,9 +605,12 @@ def display_assignment_details(assignment_id: int):
     """Display detailed assignment information"""
     with get_session() as session:
         assignment = session.get(Assignment, assignment_id)
-        student_assignments = session.exec(
-            select(StudentAssignment).where(StudentAssignment.assignment_id == assignment_id)
-        ).all()
+        # Count submissions per status in the database instead of shipping every row
+        status_counts = Counter(dict(session.exec(
+            select(StudentAssignment.status, func.count())
+            .where(StudentAssignment.assignment_id == assignment_id)
+            .group_by(StudentAssignment.status)
+        ).all()))
     
     if not assignment:
         st.error("Assignment not found")
@@ -474,9 +621,9 @@ def display_assignment_details(assignment_id: int):
     # Assignment statistics
     col1, col2, col3, col4 = st.columns(4)
     
-    total_students = len(student_assignments)
-    submitted = len([sa for sa in student_assignments if sa.status in ["submitted", "graded", "returned"]])
-    graded = len([sa for sa in student_assignments if sa.status in ["graded", "returned"]])
+    total_students = sum(status_counts.values())
+    submitted = sum(status_counts[status] for status in _DONE_STATUSES)
+    graded = status_counts["graded"] + status_counts["returned"]
     
     with col1:
         st.metric("Total Students", total_students)
@@ -509,8 +656,7 @@ def create_rubric_form():
     """Form to create a grading rubric"""
     st.subheader("Create Grading Rubric")
     
-    with get_session() as session:
-        subjects = session.exec(select(Subject)).all()
+    subjects = _load_subjects()
     
     col1, col2 = st.columns(2)
     
@@ -531,57 +677,33 @@ def create_rubric_form():
     # Rubric criteria
     st.subheader("Grading Criteria")
     
+    _expire_form_state("rubric", ["rubric_criteria", "crit_editor"])
     if 'rubric_criteria' not in st.session_state:
         st.session_state.rubric_criteria = []
     
-    # Add criteria form
-    with st.expander("➕ Add Criterion"):
-        crit_col1, crit_col2, crit_col3 = st.columns([2, 1, 1])
-        
-        with crit_col1:
-            crit_name = st.text_input("Criterion Name", placeholder="e.g., Content Quality", key="new_criterion")
-            crit_desc = st.text_area("Description", placeholder="What this criterion evaluates...", key="crit_desc")
-        
-        with crit_col2:
-            crit_weight = st.number_input("Weight (%)", min_value=1, max_value=100, value=25, key="crit_weight")
-        
-        with crit_col3:
-            st.write("**Performance Levels:**")
-            excellent = st.number_input("Excellent", value=4, key="excellent")
-            good = st.number_input("Good", value=3, key="good")
-            satisfactory = st.number_input("Satisfactory", value=2, key="satisfactory")
-            needs_improvement = st.number_input("Needs Improvement", value=1, key="needs_improvement")
-        
-        if st.button("Add Criterion"):
-            if crit_name:
-                st.session_state.rubric_criteria.append({
-                    "name": crit_name,
-                    "description": crit_desc,
-                    "weight": crit_weight,
-                    "levels": {
-                        "excellent": excellent,
-                        "good": good,
-                        "satisfactory": satisfactory,
-                        "needs_improvement": needs_improvement
-                    }
-                })
-                st.rerun()
-    
-    # Display current criteria
-    if st.session_state.rubric_criteria:
-        st.write("**Current Criteria:**")
-        for i, crit in enumerate(st.session_state.rubric_criteria):
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.write(f"{i+1}. **{crit['name']}** ({crit['weight']}%)")
-                st.caption(crit['description'])
-            with col2:
-                if st.button(f"Remove", key=f"remove_crit_{i}"):
-                    st.session_state.rubric_criteria.pop(i)
-                    st.rerun()
+    # Criteria are edited in a single table; rows are added and removed in place
+    st.caption("Add a row per criterion with its weight and points for each performance level.")
+    edited_criteria = st.data_editor(
+        _criteria_to_frame(st.session_state.rubric_criteria),
+        num_rows="dynamic",
+        use_container_width=True,
+        key="crit_editor",
+        on_change=_touch_form,
+        args=("rubric",),
+        column_config={
+            "name": st.column_config.TextColumn("Criterion", required=True, max_chars=MAX_TEXT_CHARS),
+            "description": st.column_config.TextColumn("Description", max_chars=MAX_TEXT_CHARS),
+            "weight": st.column_config.NumberColumn("Weight (%)", min_value=1, max_value=100, default=25, required=True),
+            "excellent": st.column_config.NumberColumn("Excellent", default=4, required=True),
+            "good": st.column_config.NumberColumn("Good", default=3, required=True),
+            "satisfactory": st.column_config.NumberColumn("Satisfactory", default=2, required=True),
+            "needs_improvement": st.column_config.NumberColumn("Needs Improvement", default=1, required=True),
+        }
+    )
     
     # Submit form
     if st.button("Create Rubric", type="primary"):
+        st.session_state.rubric_criteria = _criteria_from_editor(edited_criteria)
         if name and st.session_state.rubric_criteria:
             user = get_current_user()
             
@@ -590,7 +712,7 @@ def create_rubric_form():
                     name=name,
                     description=description,
                     subject_id=subject.id if subject else None,
-                    criteria=json.dumps(st.session_state.rubric_criteria),
+                    criteria=json.dumps(st.session_state.rubric_criteria, separators=(",", ":")),
                     scale_type=scale_type,
                     max_score=max_score,
                     created_by=user['id']
@@ -598,8 +720,11 @@ def create_rubric_form():
                 session.add(rubric)
                 session.commit()
             
+            _load_options.clear()
             st.success(f"Rubric '{name}' created successfully!")
             st.session_state.rubric_criteria = []
+            st.session_state.pop("crit_editor", None)
+            st.session_state.pop("_form_touched_at_rubric", None)
             st.rerun()
         else:
             st.error("Please provide a name and at least one criterion")
@@ -610,25 +735,25 @@ def display_rubrics():
     st.subheader("Existing Rubrics")
     
     with get_session() as session:
-        rubrics = session.exec(select(GradingRubric)).all()
+        # Rubrics with their subject name in one round-trip
+        rubrics = session.exec(
+            select(GradingRubric, Subject.name)
+            .join(Subject, Subject.id == GradingRubric.subject_id, isouter=True)
+        ).all()
         
         if not rubrics:
             st.info("No rubrics created yet.")
             return
-        
-        subjects = {s.id: s for s in session.exec(select(Subject)).all()}
     
-    for rubric in rubrics:
-        subject = subjects.get(rubric.subject_id)
-        
+    for rubric, subject_name in rubrics:
         with st.container():
             st.markdown("---")
             col1, col2 = st.columns([3, 1])
             
             with col1:
                 st.subheader(rubric.name)
-                if subject:
-                    st.write(f"**Subject:** {subject.name}")
+                if subject_name:
+                    st.write(f"**Subject:** {subject_name}")
                 else:
                     st.write("**Type:** General Rubric")
                 
@@ -655,7 +780,8 @@ def display_rubric_details(rubric_id: int):
     st.subheader(f"Rubric: {rubric.name}")
     
     try:
-        criteria = json.loads(rubric.criteria)
+        # Rubrics are never edited after creation, so created_at identifies the version
+        criteria = _parse_json_field(rubric.id, rubric.created_at, rubric.criteria)
         
         for crit in criteria:
             st.write(f"**{crit['name']}** ({crit['weight']}%)")
@@ -690,20 +816,30 @@ def record_assessment_form():
     """Form to record continuous assessment"""
     st.subheader("Record Continuous Assessment")
     
-    with get_session() as session:
-        students = session.exec(select(Student)).all()
-        subjects = session.exec(select(Subject)).all()
+    now = datetime.now()
+    subjects = _load_subjects()
     
-    if not students or not subjects:
+    if not subjects:
         st.warning("Please ensure you have students and subjects set up first.")
         return
     
     col1, col2 = st.columns(2)
     
     with col1:
-        student = st.selectbox("Student", students, format_func=lambda x: f"{x.first_name} {x.last_name}")
+        # Search first so the selectbox only ever holds a bounded set of matches
+        student_query = st.text_input("Search Student", placeholder="Type at least 2 letters of the name")
+        student_query = student_query.strip()
+        students = _search_students(student_query) if len(student_query) >= 2 else []
+        if len(student_query) >= 2 and not students:
+            st.caption("No matching students found.")
+        student = st.selectbox(
+            "Student", students,
+            format_func=lambda x: f"{x.first_name} {x.last_name}",
+            index=None if not students else 0,
+            placeholder="Search for a student above"
+        )
         subject = st.selectbox("Subject", subjects, format_func=lambda x: f"{x.name} ({x.code})")
-        assessment_date = st.date_input("Assessment Date", value=datetime.now().date())
+        assessment_date = st.date_input("Assessment Date", value=now.date())
     
     with col2:
         assessment_type = st.selectbox("Assessment Type", [
@@ -724,7 +860,7 @@ def record_assessment_form():
                 assessment = ContinuousAssessment(
                     student_id=student.id,
                     subject_id=subject.id,
-                    assessment_date=datetime.combine(assessment_date, datetime.now().time()),
+                    assessment_date=datetime.combine(assessment_date, now.time()),
                     assessment_type=assessment_type,
                     competency=competency,
                     level=level,
@@ -734,6 +870,7 @@ def record_assessment_form():
                 session.add(assessment)
                 session.commit()
             
+            _analytics_data.clear()
             st.success("Assessment recorded successfully!")
             st.rerun()
         else:
@@ -745,32 +882,42 @@ def display_assessments():
     st.subheader("Continuous Assessment Records")
     
     with get_session() as session:
-        assessments = session.exec(select(ContinuousAssessment)).all()
+        total = session.exec(select(func.count()).select_from(ContinuousAssessment)).one()
         
-        if not assessments:
+        if not total:
             st.info("No assessments recorded yet.")
             return
         
-        students = {s.id: s for s in session.exec(select(Student)).all()}
-        subjects = {s.id: s for s in session.exec(select(Subject)).all()}
-    
-    # Create assessments table
-    assessment_data = []
-    for assessment in assessments:
-        student = students.get(assessment.student_id)
-        subject = subjects.get(assessment.subject_id)
+        offset = _paginate(total, "assessment_page")
         
-        assessment_data.append({
-            "Date": assessment.assessment_date.strftime("%Y-%m-%d"),
-            "Student": f"{student.first_name} {student.last_name}" if student else "Unknown",
-            "Subject": subject.name if subject else "Unknown",
-            "Type": assessment.assessment_type.replace("_", " ").title(),
-            "Competency": assessment.competency,
-            "Level": assessment.level.replace("_", " ").title(),
-            "Notes": assessment.notes[:50] + "..." if assessment.notes and len(assessment.notes) > 50 else assessment.notes or ""
-        })
-    
-    df = pd.DataFrame(assessment_data)
+        # One joined query straight into a DataFrame; no per-row ORM objects or dicts
+        rows = session.exec(
+            select(
+                ContinuousAssessment.assessment_date, Student.first_name, Student.last_name,
+                Subject.name, ContinuousAssessment.assessment_type, ContinuousAssessment.competency,
+                ContinuousAssessment.level, ContinuousAssessment.notes
+            )
+            .join(Student, Student.id == ContinuousAssessment.student_id, isouter=True)
+            .join(Subject, Subject.id == ContinuousAssessment.subject_id, isouter=True)
+            .order_by(ContinuousAssessment.assessment_date.desc(), ContinuousAssessment.id.desc())
+            .offset(offset)
+            .limit(PAGE_SIZE)
+        ).all()
+    
+    df = pd.DataFrame(rows, columns=[
+        "Date", "first_name", "last_name", "Subject", "Type", "Competency", "Level", "Notes"
+    ])
+    
+    # Format columns for display
+    df["Date"] = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m-%d")
+    df["Student"] = (df["first_name"] + " " + df["last_name"]).fillna("Unknown")
+    df["Subject"] = df["Subject"].fillna("Unknown")
+    df["Type"] = df["Type"].str.replace("_", " ").str.title()
+    df["Level"] = df["Level"].str.replace("_", " ").str.title()
+    notes = df["Notes"].fillna("")
+    df["Notes"] = notes.where(notes.str.len() <= 50, notes.str[:50] + "...")
+    
+    df = df[["Date", "Student", "Subject", "Type", "Competency", "Level", "Notes"]]
     st.dataframe(df, use_container_width=True)
 
 
@@ -778,34 +925,26 @@ def render_assessment_analytics():
     """Assessment analytics and insights"""
     st.subheader("📈 Assessment Analytics")
     
-    with get_session() as session:
-        assignments = session.exec(select(Assignment)).all()
-        student_assignments = session.exec(select(StudentAssignment)).all()
-        assessments = session.exec(select(ContinuousAssessment)).all()
+    # Tab bodies run on every rerun; only aggregate when the user asks for it
+    if not st.checkbox("Show analytics", value=False, key="show_assessment_analytics"):
+        st.caption("Tick the box above to load assessment analytics.")
+        return
+    
+    completion_df, assessments = _analytics_data()
     
-    if not assignments and not assessments:
+    if completion_df.empty and not assessments:
         st.info("No assessment data available yet.")
         return
     
     # Assignment completion rates
-    if assignments:
+    if not completion_df.empty:
         st.subheader("Assignment Completion Rates")
         
-        completion_data = []
-        for assignment in assignments:
-            assignment_submissions = [sa for sa in student_assignments if sa.assignment_id == assignment.id]
-            total = len(assignment_submissions)
-            submitted = len([sa for sa in assignment_submissions if sa.status in ["submitted", "graded", "returned"]])
-            completion_rate = (submitted / total * 100) if total > 0 else 0
-            
-            completion_data.append({
-                "Assignment": assignment.title,
-                "Total Students": total,
-                "Submitted": submitted,
-                "Completion Rate": completion_rate
-            })
-        
-        completion_df = pd.DataFrame(completion_data)
+        completion_df = completion_df.assign(
+            **{"Completion Rate": (
+                completion_df["Submitted"] / completion_df["Total Students"].where(completion_df["Total Students"] > 0) * 100
+            ).fillna(0)}
+        )
         st.dataframe(completion_df, use_container_width=True)
     
     # Continuous assessment insights
@@ -813,9 +952,7 @@ def render_assessment_analytics():
         st.subheader("Continuous Assessment Summary")
         
         # Performance level distribution
-        level_counts = {}
-        for assessment in assessments:
-            level_counts[assessment.level] = level_counts.get(assessment.level, 0) + 1
+        level_counts = Counter(assessment.level for assessment in assessments)
         
         col1, col2 = st.columns(2)
         
@@ -826,14 +963,11 @@ def render_assessment_analytics():
         
         with col2:
             # Most assessed competencies
-            competency_counts = {}
-            for assessment in assessments:
-                competency_counts[assessment.competency] = competency_counts.get(assessment.competency, 0) + 1
+            competency_counts = Counter(assessment.competency for assessment in assessments)
             
             if competency_counts:
                 st.write("**Most Assessed Competencies:**")
-                sorted_competencies = sorted(competency_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-                for competency, count in sorted_competencies:
+                for competency, count in competency_counts.most_common(5):
                     st.write(f"• {competency}: {count} assessments")
 
 
@@ -842,30 +976,37 @@ def grade_assignments_interface():
     st.subheader("Grade Assignments")
     
     with get_session() as session:
-        # Get assignments that need grading
-        assignments = session.exec(select(Assignment)).all()
+        # Get assignments that need grading; only the columns the grader shows
+        assignments = session.exec(
+            select(
+                Assignment.id, Assignment.title, Assignment.assignment_type,
+                Assignment.total_points, Assignment.due_date
+            )
+        ).all()
         
         if not assignments:
             st.info("No assignments available for grading.")
             return
-    
-    # Select assignment to grade
-    assignment = st.selectbox(
-        "Select Assignment to Grade",
-        assignments,
-        format_func=lambda x: f"{x.title} ({x.assignment_type})"
-    )
-    
-    if assignment:
-        with get_session() as session:
-            student_assignments = session.exec(
-                select(StudentAssignment).where(StudentAssignment.assignment_id == assignment.id)
-            ).all()
-            students = {s.id: s for s in session.exec(select(Student)).all()}
         
-        # Filter to show only submitted assignments
-        submitted_assignments = [sa for sa in student_assignments if sa.status == "submitted"]
+        # Select assignment to grade
+        assignment = st.selectbox(
+            "Select Assignment to Grade",
+            assignments,
+            format_func=lambda x: f"{x.title} ({x.assignment_type})"
+        )
         
+        # Only submitted work, with the submitting student's name, on the same session
+        submitted_assignments = session.exec(
+            select(StudentAssignment, Student.first_name, Student.last_name)
+            .join(Student, Student.id == StudentAssignment.student_id)
+            .where(
+                StudentAssignment.assignment_id == assignment.id,
+                StudentAssignment.status == "submitted"
+            )
+            .order_by(StudentAssignment.id)
+        ).all() if assignment else []
+    
+    if assignment:
         if not submitted_assignments:
             st.info("No submitted assignments to grade for this assignment.")
             return
@@ -875,54 +1016,52 @@ def grade_assignments_interface():
         st.write(f"**Submitted Assignments:** {len(submitted_assignments)}")
         
         # Grade individual submissions
-        for sa in submitted_assignments:
-            student = students.get(sa.student_id)
-            if not student:
-                continue
-            
-            with st.expander(f"Grade: {student.first_name} {student.last_name}"):
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    if sa.submission_text:
-                        st.write("**Submission:**")
-                        st.text_area("", value=sa.submission_text, height=100, disabled=True, key=f"submission_{sa.id}")
+        for sa, first_name, last_name in submitted_assignments:
+            with st.expander(f"Grade: {first_name} {last_name}"):
+                # A form per submission: inputs rerun the script only when saved
+                with st.form(key=f"grade_form_{sa.id}", clear_on_submit=False):
+                    col1, col2 = st.columns(2)
                     
-                    if sa.submission_date:
-                        st.write(f"**Submitted:** {sa.submission_date.strftime('%Y-%m-%d %H:%M')}")
+                    with col1:
+                        if sa.submission_text:
+                            st.write("**Submission:**")
+                            st.text_area("", value=sa.submission_text, height=100, disabled=True, key=f"submission_{sa.id}")
                         
-                        # Check if late
-                        if sa.submission_date > assignment.due_date:
-                            st.warning("Late Submission")
-                
-                with col2:
-                    score = st.number_input(
-                        "Score",
-                        min_value=0.0,
-                        max_value=assignment.total_points,
-                        value=sa.score if sa.score else 0.0,
-                        key=f"score_{sa.id}"
-                    )
-                    
-                    feedback = st.text_area(
-                        "Feedback",
-                        value=sa.feedback if sa.feedback else "",
-                        placeholder="Provide feedback to the student...",
-                        key=f"feedback_{sa.id}"
-                    )
+                        if sa.submission_date:
+                            st.write(f"**Submitted:** {sa.submission_date.strftime('%Y-%m-%d %H:%M')}")
+                            
+                            # Check if late
+                            if sa.submission_date > assignment.due_date:
+                                st.warning("Late Submission")
                     
-                    if st.button(f"Save Grade", key=f"save_{sa.id}"):
-                        user = get_current_user()
+                    with col2:
+                        score = st.number_input(
+                            "Score",
+                            min_value=0.0,
+                            max_value=assignment.total_points,
+                            value=sa.score if sa.score else 0.0,
+                            key=f"score_{sa.id}"
+                        )
                         
-                        with get_session() as session:
-                            sa_to_update = session.get(StudentAssignment, sa.id)
-                            if sa_to_update:
-                                sa_to_update.score = score
-                                sa_to_update.feedback = feedback
-                                sa_to_update.status = "graded"
-                                sa_to_update.graded_by = user['id']
-                                sa_to_update.graded_at = datetime.utcnow()
-                                session.commit()
+                        feedback = st.text_area(
+                            "Feedback",
+                            value=sa.feedback if sa.feedback else "",
+                            placeholder="Provide feedback to the student...",
+                            key=f"feedback_{sa.id}"
+                        )
                         
-                        st.success("Grade saved!")
-                        st.rerun()
\ No newline at end of file
+                        if st.form_submit_button("Save Grade"):
+                            user = get_current_user()
+                            
+                            with get_session() as session:
+                                sa_to_update = session.get(StudentAssignment, sa.id)
+                                if sa_to_update:
+                                    sa_to_update.score = score
+                                    sa_to_update.feedback = feedback
+                                    sa_to_update.status = "graded"
+                                    sa_to_update.graded_by = user['id']
+                                    sa_to_update.graded_at = datetime.utcnow()
+                                    session.commit()
+                            
+                            st.success("Grade saved!")
+                            st.rerun()
\ No newline at end of file
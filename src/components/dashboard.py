@@ -1,129 +1,176 @@
 import streamlit as st
+import numpy as np
+import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from services.db import get_session, Student, Subject, Mark, Class
-from sqlmodel import select
+from sqlmodel import select, func
 from utils.rbac import get_current_user, get_user_accessible_students
 
 
-def get_analytics_data():
-    """Fetch and prepare data for analytics based on user role and permissions"""
-    # Get current user for filtering
-    current_user = get_current_user()
-    if not current_user:
-        st.error("Please log in to view dashboard.")
-        return [], [], []
-    
-    user_role = current_user.get('role', '')
-    user_id = current_user.get('id', 0)
-    
+# Score lower bounds for grades D, C, B and A; anything below 60 is an F
+GRADE_BOUNDARIES = [60, 70, 80, 90]
+GRADE_LABELS = ['F', 'D', 'C', 'B', 'A']
+
+MARK_COLUMNS = [
+    'score', 'term', 'student_name', 'class_name', 'student_id',
+    'student_aggregate', 'subject_name', 'subject_code'
+]
+CATEGORY_COLUMNS = ['term', 'class_name', 'subject_name', 'subject_code']
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_analytics_data(user_id: int, user_role: str):
+    """Load (status, student_count, subject_count, marks_df) for a user; cached and free of UI calls
+    
+    Only plain counts and a DataFrame are returned, so cache hits do not pickle ORM objects.
+    status is None on success, or the get_user_accessible_students sentinel (-1/-2)
+    when a teacher has no classes or no students.
+    """
     with get_session() as session:
         # Filter data based on user role
         if user_role == 'Teacher':
             # Get only students from teacher's assigned classes
             accessible_student_ids = get_user_accessible_students(user_id, user_role)
             
-            if accessible_student_ids == [-1]:
-                st.warning("No class assignments found. Please contact an administrator to assign you to classes.")
-                return [], [], []
-            elif accessible_student_ids == [-2]:
-                st.info("You are assigned to classes, but there are no students in your assigned classes yet.")
-                return [], [], []
+            if accessible_student_ids in ([-1], [-2]):
+                return accessible_student_ids[0], 0, 0, pd.DataFrame(columns=MARK_COLUMNS)
             else:
-                # Get students based on accessible IDs
+                # Get students based on accessible IDs in one query
                 if accessible_student_ids:
-                    students = []
-                    for student_id in accessible_student_ids:
-                        student = session.get(Student, student_id)
-                        if student:
-                            students.append(student)
+                    students = session.exec(
+                        select(Student.id, Student.class_id).where(Student.id.in_(accessible_student_ids))
+                    ).all()
                 else:
                     students = []
         else:
             # Admin and Head can see all students
-            students = session.exec(select(Student)).all()
+            students = session.exec(select(Student.id, Student.class_id)).all()
         
         # Get all subjects (teachers can see subjects for their class categories)
         if user_role == 'Teacher' and students:
-            # Get unique class categories for teacher's students
-            class_categories = set()
-            for student in students:
-                student_class = session.get(Class, student.class_id)
-                if student_class:
-                    class_categories.add(student_class.category)
-            
-            # Get subjects for those categories
-            subjects = []
-            for category in class_categories:
-                category_subjects = session.exec(select(Subject).where(Subject.category == category)).all()
-                subjects.extend(category_subjects)
+            # Unique class categories of the teacher's students, then their subjects
+            class_categories = session.exec(
+                select(Class.category)
+                .where(Class.id.in_({student.class_id for student in students}))
+                .distinct()
+            ).all()
+            subject_count = session.exec(
+                select(func.count(Subject.id)).where(Subject.category.in_(class_categories))
+            ).one()
         else:
             # Admin and Head see all subjects
-            subjects = session.exec(select(Subject)).all()
-        
-        # Get all classes (filtered for teachers)
-        classes = session.exec(select(Class)).all()
-        class_map = {cls.id: cls for cls in classes}
+            subject_count = session.exec(select(func.count(Subject.id))).one()
         
-        # Filter marks based on accessible students
+        # One joined query yields each accessible mark with its student, subject and class.
+        # Inner joins drop marks whose student or subject no longer exists.
         if students:
-            accessible_student_ids_set = set(s.id for s in students)
-            all_marks = session.exec(select(Mark)).all()
-            # Filter marks to only include those from accessible students
-            marks = [mark for mark in all_marks if mark.student_id in accessible_student_ids_set]
+            marks_query = (
+                select(
+                    Mark.score, Mark.term,
+                    Student.id, Student.first_name, Student.last_name, Student.aggregate,
+                    Subject.name, Subject.code,
+                    Class.name.label("class_name"), Class.category
+                )
+                .join(Student, Student.id == Mark.student_id)
+                .join(Subject, Subject.id == Mark.subject_id)
+                .join(Class, Class.id == Student.class_id, isouter=True)
+                .order_by(Mark.id)
+            )
+            if user_role == 'Teacher':
+                # Admin and Head see every student, so only teachers need the id filter
+                marks_query = marks_query.where(Mark.student_id.in_([s.id for s in students]))
+            rows = session.exec(marks_query).all()
         else:
-            marks = []
-        
-        # Convert to simple list of dicts for processing
-        marks_data = []
-        for mark in marks:
-            student = session.get(Student, mark.student_id)
-            subject = session.get(Subject, mark.subject_id)
-            
-            # Skip marks with missing student or subject data
-            if not student or not subject:
-                continue
-                
-            student_class = class_map.get(student.class_id) if student else None
-            
-            marks_data.append({
-                'score': mark.score,
-                'term': mark.term,
-                'student_name': f"{student.first_name} {student.last_name}",
-                'class_name': f"{student_class.name} ({student_class.category})" if student_class else "Unknown",
-                'student_id': student.id,
-                'student_aggregate': student.aggregate,
-                'subject_name': subject.name,
-                'subject_code': subject.code
-            })
-        
-        return students, subjects, marks_data
+            rows = []
+        
+        # One row per mark; the renderers aggregate this frame with pandas
+        marks_df = pd.DataFrame([
+            {
+                'score': row.score,
+                'term': row.term,
+                'student_name': f"{row.first_name} {row.last_name}",
+                'class_name': f"{row.class_name} ({row.category})" if row.class_name is not None else "Unknown",
+                'student_id': row.id,
+                'student_aggregate': row.aggregate,
+                'subject_name': row.name,
+                'subject_code': row.code
+            }
+            for row in rows
+        ], columns=MARK_COLUMNS)
+        # Labels repeat on every mark; categorical codes make the renderers' groupbys cheaper
+        marks_df = marks_df.astype({column: 'category' for column in CATEGORY_COLUMNS})
+        
+        return None, len(students), subject_count, marks_df
 
 
-def render_summary_cards(students, subjects, marks_data):
-    """Render summary statistics cards with role-aware context"""
-    # Get current user for context
+def clear_analytics_cache():
+    """Drop the cached analytics data so the next render reloads it"""
+    _load_analytics_data.clear()
+
+
+def get_analytics_data():
+    """Fetch and prepare data for analytics based on user role and permissions"""
+    # Get current user for filtering
     current_user = get_current_user()
-    user_role = current_user.get('role', '') if current_user else ''
+    if not current_user:
+        st.error("Please log in to view dashboard.")
+        return 0, 0, pd.DataFrame(columns=MARK_COLUMNS)
+    
+    status, student_count, subject_count, marks_df = _load_analytics_data(
+        current_user.get('id', 0), current_user.get('role', '')
+    )
+    
+    if status == -1:
+        st.warning("No class assignments found. Please contact an administrator to assign you to classes.")
+    elif status == -2:
+        st.info("You are assigned to classes, but there are no students in your assigned classes yet.")
     
+    return student_count, subject_count, marks_df
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _performance_csv(marks_df: pd.DataFrame) -> bytes:
+    """Per-mark CSV export; pandas quotes names containing commas"""
+    return marks_df[['student_name', 'class_name', 'subject_name', 'term', 'score']].rename(columns={
+        'student_name': 'Student', 'class_name': 'Class', 'subject_name': 'Subject',
+        'term': 'Term', 'score': 'Score'
+    }).to_csv(index=False).encode('utf-8')
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _summary_csv(marks_df: pd.DataFrame) -> bytes:
+    """Average score and mark count per class and subject as CSV"""
+    return (
+        marks_df.groupby(['class_name', 'subject_name'], sort=False, observed=True)['score']
+        .agg(Average_Score='mean', Count='count')
+        .rename_axis(['Class', 'Subject'])
+        .reset_index()
+        .to_csv(index=False, float_format='%.2f')
+        .encode('utf-8')
+    )
+
+
+def render_summary_cards(student_count, subject_count, marks_df, user_role: str):
+    """Render summary statistics cards with role-aware context"""
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
         if user_role == 'Teacher':
-            st.metric("Your Students", len(students), help="Students in your assigned classes")
+            st.metric("Your Students", student_count, help="Students in your assigned classes")
         else:
-            st.metric("Total Students", len(students), help="All students in the system")
+            st.metric("Total Students", student_count, help="All students in the system")
     
     with col2:
         if user_role == 'Teacher':
-            st.metric("Your Subjects", len(subjects), help="Subjects taught in your classes")
+            st.metric("Your Subjects", subject_count, help="Subjects taught in your classes")
         else:
-            st.metric("Total Subjects", len(subjects), help="All subjects in the system")
+            st.metric("Total Subjects", subject_count, help="All subjects in the system")
     
     with col3:
-        if marks_data:
-            total_marks = len(marks_data)
+        if not marks_df.empty:
+            total_marks = len(marks_df)
             if user_role == 'Teacher':
                 st.metric("Marks Entered", total_marks, help="Marks for your students")
             else:
@@ -132,8 +179,8 @@ def render_summary_cards(students, subjects, marks_data):
             st.metric("Marks Entered", 0)
     
     with col4:
-        if marks_data:
-            avg_score = sum(m['score'] for m in marks_data) / len(marks_data)
+        if not marks_df.empty:
+            avg_score = marks_df['score'].mean()
             if user_role == 'Teacher':
                 st.metric("Class Average", f"{avg_score:.1f}%", help="Average score for your students")
             else:
@@ -143,8 +190,8 @@ def render_summary_cards(students, subjects, marks_data):
     
     with col5:
         # Calculate number of students who have reports (have at least one mark)
-        if marks_data:
-            students_with_reports = len(set(m['student_name'] for m in marks_data))
+        if not marks_df.empty:
+            students_with_reports = marks_df['student_name'].nunique()
             if user_role == 'Teacher':
                 st.metric("Students with Marks", students_with_reports, help="Your students who have marks entered")
             else:
@@ -153,94 +200,62 @@ def render_summary_cards(students, subjects, marks_data):
             st.metric("Students with Reports", 0)
 
 
-def render_grade_distribution(marks_data):
+def render_grade_distribution(marks_df):
     """Render grade distribution chart"""
-    if not marks_data:
+    if marks_df.empty:
         st.info("No marks data available for grade distribution")
         return
     
-    # Define grade boundaries
-    def get_grade(score):
-        if score >= 90: return 'A'
-        elif score >= 80: return 'B'
-        elif score >= 70: return 'C'
-        elif score >= 60: return 'D'
-        else: return 'F'
-    
-    # Count grades
-    grade_counts = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
-    for mark in marks_data:
-        grade = get_grade(mark['score'])
-        grade_counts[grade] += 1
+    # Bucket scores into grades: [90, inf) A, [80, 90) B, [70, 80) C, [60, 70) D, below 60 F
+    grade_index = np.digitize(marks_df['score'].to_numpy(), GRADE_BOUNDARIES)
+    grade_counts = pd.Series(np.bincount(grade_index, minlength=len(GRADE_LABELS)), index=GRADE_LABELS)[::-1]
     
     fig = px.bar(
-        x=list(grade_counts.keys()),
-        y=list(grade_counts.values()),
+        x=grade_counts.index.tolist(),
+        y=grade_counts.tolist(),
         title="Grade Distribution",
         labels={'x': 'Grade', 'y': 'Number of Students'},
-        color=list(grade_counts.values()),
+        color=grade_counts.tolist(),
         color_continuous_scale='RdYlGn_r'
     )
     
     st.plotly_chart(fig, use_container_width=True)
 
 
-def render_class_performance(marks_data):
+def render_class_performance(marks_df):
     """Render class-wise performance chart"""
-    if not marks_data:
+    if marks_df.empty:
         st.info("No marks data available for class performance")
         return
     
-    # Group by class
-    class_scores = {}
-    for mark in marks_data:
-        class_name = mark['class_name']
-        if class_name not in class_scores:
-            class_scores[class_name] = []
-        class_scores[class_name].append(mark['score'])
-    
-    # Calculate averages
-    class_averages = {}
-    for class_name, scores in class_scores.items():
-        class_averages[class_name] = sum(scores) / len(scores)
+    class_averages = marks_df.groupby('class_name', sort=False, observed=True)['score'].mean()
     
     fig = px.bar(
-        x=list(class_averages.keys()),
-        y=list(class_averages.values()),
+        x=class_averages.index.tolist(),
+        y=class_averages.tolist(),
         title="Average Performance by Class",
         labels={'x': 'Class', 'y': 'Average Score (%)'},
-        text=[f"{v:.1f}%" for v in class_averages.values()]
+        text=[f"{v:.1f}%" for v in class_averages]
     )
     
     fig.update_traces(textposition='outside')
     st.plotly_chart(fig, use_container_width=True)
 
 
-def render_subject_performance(marks_data):
+def render_subject_performance(marks_df):
     """Render subject-wise performance chart"""
-    if not marks_data:
+    if marks_df.empty:
         st.info("No marks data available for subject performance")
         return
     
-    # Group by subject
-    subject_scores = {}
-    for mark in marks_data:
-        subject_name = mark['subject_name']
-        if subject_name not in subject_scores:
-            subject_scores[subject_name] = []
-        subject_scores[subject_name].append(mark['score'])
-    
-    # Calculate averages
-    subject_averages = {}
-    for subject_name, scores in subject_scores.items():
-        subject_averages[subject_name] = sum(scores) / len(scores)
+    subject_averages = marks_df.groupby('subject_name', sort=False, observed=True)['score'].mean()
     
     fig = px.bar(
-        x=list(subject_averages.keys()),
-        y=list(subject_averages.values()),
+        x=subject_averages.index.tolist(),
+        y=subject_averages.tolist(),
         title="Average Performance by Subject",
         labels={'x': 'Subject', 'y': 'Average Score (%)'},
-        text=[f"{v:.1f}%" for v in subject_averages.values()]
+        text=[f"{v:.1f}%" for v in subject_averages]
     )
     
     fig.update_traces(textposition='outside')
@@ -248,45 +263,21 @@ def render_subject_performance(marks_data):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def render_term_comparison(marks_data):
+def render_term_comparison(marks_df):
     """Render term-wise performance comparison"""
-    if not marks_data:
+    if marks_df.empty:
         st.info("No marks data available for term comparison")
         return
     
-    # Group by term and subject
-    term_subject_scores = {}
-    for mark in marks_data:
-        key = (mark['term'], mark['subject_name'])
-        if key not in term_subject_scores:
-            term_subject_scores[key] = []
-        term_subject_scores[key].append(mark['score'])
-    
-    # Calculate averages and prepare data for plotting
-    plot_data = []
-    for (term, subject), scores in term_subject_scores.items():
-        avg_score = sum(scores) / len(scores)
-        plot_data.append({
-            'term': term,
-            'subject_name': subject,
-            'score': avg_score
-        })
-    
-    if not plot_data:
-        return
+    # Average score per (term, subject), in order of first appearance
+    plot_data = marks_df.groupby(['term', 'subject_name'], sort=False, observed=True)['score'].mean().reset_index()
     
-    # Group by subject for line plotting
-    subjects = list(set(d['subject_name'] for d in plot_data))
     fig = go.Figure()
     
-    for subject in subjects:
-        subject_data = [d for d in plot_data if d['subject_name'] == subject]
-        terms = [d['term'] for d in subject_data]
-        scores = [d['score'] for d in subject_data]
-        
+    for subject, subject_data in plot_data.groupby('subject_name', sort=False, observed=True):
         fig.add_trace(go.Scatter(
-            x=terms,
-            y=scores,
+            x=subject_data['term'].tolist(),
+            y=subject_data['score'].tolist(),
             mode='lines+markers',
             name=subject,
             line=dict(width=2),
@@ -303,87 +294,54 @@ def render_term_comparison(marks_data):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def render_top_performers(marks_data):
+def render_top_performers(marks_df):
     """Render top performing students"""
-    if not marks_data:
+    if marks_df.empty:
         st.info("No marks data available for top performers")
         return
     
-    # Group by student
-    student_scores = {}
-    for mark in marks_data:
-        student_name = mark['student_name']
-        if student_name not in student_scores:
-            student_scores[student_name] = []
-        student_scores[student_name].append(mark['score'])
-    
-    # Calculate averages
-    student_averages = []
-    for student_name, scores in student_scores.items():
-        avg_score = sum(scores) / len(scores)
-        student_averages.append({
-            'name': student_name,
-            'avg_score': avg_score,
-            'num_subjects': len(scores)
-        })
-    
-    # Sort by average score
-    student_averages.sort(key=lambda x: x['avg_score'], reverse=True)
+    # Average per student; stable sort keeps first-seen order among ties
+    student_averages = (
+        marks_df.groupby('student_name', sort=False)['score']
+        .agg(avg_score='mean', num_subjects='count')
+        .sort_values('avg_score', ascending=False, kind='stable')
+    )
     
     st.subheader("🏆 Top 10 Performers")
-    top_10 = student_averages[:10]
+    top_10 = student_averages.head(10)
     
-    for i, student in enumerate(top_10, 1):
+    for i, (name, student) in enumerate(top_10.iterrows(), 1):
         col1, col2, col3 = st.columns([1, 3, 1])
         with col1:
             st.write(f"#{i}")
         with col2:
-            st.write(f"**{student['name']}**")
+            st.write(f"**{name}**")
         with col3:
             st.write(f"{student['avg_score']:.1f}%")
 
 
-def render_performance_heatmap(marks_data):
+def render_performance_heatmap(marks_df):
     """Render student-subject performance heatmap"""
-    if not marks_data:
+    if marks_df.empty:
         st.info("No marks data available for performance heatmap")
         return
     
-    # Create pivot-like structure
-    students = list(set(m['student_name'] for m in marks_data))
-    subjects = list(set(m['subject_name'] for m in marks_data))
-    
-    # Create matrix
-    matrix = []
-    student_labels = []
-    
-    for student in students:
-        row = []
-        for subject in subjects:
-            # Find score for this student-subject combination
-            score = None
-            for mark in marks_data:
-                if mark['student_name'] == student and mark['subject_name'] == subject:
-                    score = mark['score']
-                    break
-            row.append(score if score is not None else 0)
-        matrix.append(row)
-        student_labels.append(student)
-    
-    if not matrix:
-        return
+    # Student x subject matrix of average scores; missing combinations show as 0
+    pivot = marks_df.pivot_table(
+        index='student_name', columns='subject_name', values='score', aggfunc='mean', fill_value=0, observed=True
+    )
     
     fig = px.imshow(
-        matrix,
+        pivot.values,
         labels=dict(x="Subject", y="Student", color="Score"),
-        x=subjects,
-        y=student_labels,
+        x=pivot.columns.tolist(),
+        y=pivot.index.tolist(),
         title="Student-Subject Performance Heatmap",
         color_continuous_scale='RdYlGn',
         aspect="auto"
     )
     
-    fig.update_layout(height=max(400, len(student_labels) * 25))
+    fig.update_layout(height=max(400, len(pivot.index) * 25))
     st.plotly_chart(fig, use_container_width=True)
 
 
@@ -398,6 +356,9 @@ def render_dashboard():
     col1, col2 = st.columns([3, 1])
     with col1:
         st.title("📊 Student Performance Dashboard")
+        # Dashboard data is cached for a minute; let users pick up fresh marks immediately
+        if st.button("🔄 Refresh data", key="dashboard_refresh"):
+            clear_analytics_cache()
     with col2:
         if user_role == 'Teacher':
             st.success(f"👨‍🏫 {user_role}: {username}")
@@ -410,17 +371,14 @@ def render_dashboard():
             st.caption("Full system access")
     
     # Get data
-    students, subjects, marks_data = get_analytics_data()
+    student_count, subject_count, marks_df = get_analytics_data()
     
     # Summary cards
-    render_summary_cards(students, subjects, marks_data)
+    render_summary_cards(student_count, subject_count, marks_df, user_role)
     
     st.divider()
     
     # Quick Action Buttons (role-based)
-    current_user = get_current_user()
-    user_role = current_user.get('role', '') if current_user else ''
-    
     st.subheader("🚀 Quick Actions")
     
     if user_role == 'Teacher':
@@ -490,12 +448,12 @@ def render_dashboard():
     col1, col2 = st.columns(2)
     
     with col1:
-        render_grade_distribution(marks_data)
-        render_class_performance(marks_data)
+        render_grade_distribution(marks_df)
+        render_class_performance(marks_df)
     
     with col2:
-        render_subject_performance(marks_data)
-        render_term_comparison(marks_data)
+        render_subject_performance(marks_df)
+        render_term_comparison(marks_df)
     
     st.divider()
     
@@ -503,37 +461,25 @@ def render_dashboard():
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        render_performance_heatmap(marks_data)
+        render_performance_heatmap(marks_df)
     
     with col2:
-        render_top_performers(marks_data)
+        render_top_performers(marks_df)
     
     # Data export section
-    if marks_data:
+    if not marks_df.empty:
         st.divider()
         
         # Report statistics section
         st.subheader("📈 Report Statistics")
         
         # Calculate detailed report metrics
-        students_with_reports = set(m['student_name'] for m in marks_data)
-        total_possible_reports = len(students)
-        report_completion_rate = (len(students_with_reports) / total_possible_reports * 100) if total_possible_reports > 0 else 0
-        
-        # Term-wise report counts
-        term_report_counts = {}
-        for mark in marks_data:
-            term = mark['term']
-            student = mark['student_name']
-            key = f"{term}_{student}"
-            term_report_counts[key] = True
+        students_with_reports = marks_df['student_name'].nunique()
+        total_possible_reports = student_count
+        report_completion_rate = (students_with_reports / total_possible_reports * 100) if total_possible_reports > 0 else 0
         
-        reports_by_term = {}
-        for term_student in term_report_counts.keys():
-            term = term_student.split('_')[0]
-            if term not in reports_by_term:
-                reports_by_term[term] = 0
-            reports_by_term[term] += 1
+        # Term-wise report counts: distinct students with marks in each term
+        reports_by_term = marks_df.groupby('term', sort=False, observed=True)['student_id'].nunique()
         
         col1, col2, col3 = st.columns(3)
         
@@ -541,22 +487,22 @@ def render_dashboard():
             st.metric(
                 "Report Completion Rate", 
                 f"{report_completion_rate:.1f}%",
-                f"{len(students_with_reports)}/{total_possible_reports} students"
+                f"{students_with_reports}/{total_possible_reports} students"
             )
         
         with col2:
-            total_individual_reports = sum(reports_by_term.values())
+            total_individual_reports = int(reports_by_term.sum())
             st.metric("Total Individual Reports", total_individual_reports)
         
         with col3:
-            if reports_by_term:
-                most_active_term = max(reports_by_term.keys(), key=lambda x: reports_by_term[x])
+            if not reports_by_term.empty:
+                most_active_term = reports_by_term.idxmax()
                 st.metric("Most Active Term", f"{most_active_term} ({reports_by_term[most_active_term]} reports)")
             else:
                 st.metric("Most Active Term", "N/A")
         
         # Show term breakdown
-        if reports_by_term:
+        if not reports_by_term.empty:
             st.write("**Reports by Term:**")
             term_cols = st.columns(len(reports_by_term))
             for i, (term, count) in enumerate(reports_by_term.items()):
@@ -569,45 +515,17 @@ def render_dashboard():
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("Download Performance Report (CSV)"):
-                # Convert to CSV format
-                csv_lines = ["Student,Class,Subject,Term,Score"]
-                for mark in marks_data:
-                    line = f"{mark['student_name']},{mark['class_name']},{mark['subject_name']},{mark['term']},{mark['score']}"
-                    csv_lines.append(line)
-                csv_content = "\n".join(csv_lines)
-                
-                st.download_button(
-                    label="Download CSV",
-                    data=csv_content,
-                    file_name="student_performance_report.csv",
-                    mime="text/csv"
-                )
+            st.download_button(
+                label="Download Performance Report (CSV)",
+                data=_performance_csv(marks_df),
+                file_name="student_performance_report.csv",
+                mime="text/csv"
+            )
         
         with col2:
-            if st.button("Download Summary Statistics"):
-                # Create summary statistics
-                summary_lines = ["Class,Subject,Average_Score,Count"]
-                
-                # Group by class and subject
-                class_subject_stats = {}
-                for mark in marks_data:
-                    key = (mark['class_name'], mark['subject_name'])
-                    if key not in class_subject_stats:
-                        class_subject_stats[key] = []
-                    class_subject_stats[key].append(mark['score'])
-                
-                for (class_name, subject_name), scores in class_subject_stats.items():
-                    avg_score = sum(scores) / len(scores)
-                    count = len(scores)
-                    line = f"{class_name},{subject_name},{avg_score:.2f},{count}"
-                    summary_lines.append(line)
-                
-                summary_content = "\n".join(summary_lines)
-                
-                st.download_button(
-                    label="Download Summary CSV",
-                    data=summary_content,
-                    file_name="performance_summary.csv",
-                    mime="text/csv"
-                )
+            st.download_button(
+                label="Download Summary Statistics",
+                data=_summary_csv(marks_df),
+                file_name="performance_summary.csv",
+                mime="text/csv"
+            )
@@ -31,36 +31,41 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
 from services.db import get_session, Student, Subject, Mark, Class
 from sqlmodel import select, and_, func
-from components.dashboard import get_analytics_data
+from components.dashboard import get_analytics_data, clear_analytics_cache
 
-# Optional imports for advanced analytics
-try:
-    from sklearn.linear_model import LinearRegression
-    from sklearn.preprocessing import StandardScaler
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
-    LinearRegression = None
-    StandardScaler = None
+# Fixed category orders keep charts and filters stable across reruns
+TREND_DIRECTIONS = ['Improving', 'Declining', 'Stable', 'Insufficient Data']
+PREDICTION_CONFIDENCES = ['High', 'Medium', 'Low', 'Insufficient Data']
 
+# Risk factors with their risk-score weights; each factor owns one bit of a student's risk flags
+RISK_FACTORS = [
+    ("Low performance (<50%)", 3),
+    ("Below average performance", 1),
+    ("Declining trend", 2),
+    ("Insufficient assessments", 1),
+    ("Inconsistent performance", 1),
+]
+RISK_FACTOR_BITS = np.array([1 << bit for bit in range(len(RISK_FACTORS))], dtype=np.int8)
+
+# Fewest students for which the metrics correlation matrix is shown
+MIN_CORRELATION_STUDENTS = 30
 
 def render_enhanced_analytics():
     """Main enhanced analytics dashboard"""
     st.title("📊 Enhanced Analytics Dashboard")
     st.markdown("*Advanced insights with predictive analytics and risk identification*")
     
-    # Show sklearn availability status
-    if not SKLEARN_AVAILABLE:
-        st.warning("⚠️ **Limited Functionality**: Advanced predictive features are disabled. To enable them, install scikit-learn: `pip install scikit-learn`")
-        st.info("💡 Basic analytics are still available without advanced machine learning features.")
-    else:
-        st.success("✅ **Full Functionality**: All advanced analytics features are available.")
+    # Added or removed marks change the version key and rebuild the frames; edits to existing
+    # rows are picked up when the cache expires or via Refresh
+    if st.button("🔄 Refresh data", key="enhanced_analytics_refresh"):
+        clear_analytics_cache()
+        prepare_enhanced_analytics_data.clear()
     
     # Get enhanced data
-    students, subjects, marks_data = get_analytics_data()
-    enhanced_data = prepare_enhanced_analytics_data()
+    _, _, marks_df = get_analytics_data()
+    enhanced_data, latest_data = prepare_enhanced_analytics_data(get_marks_version())
     
-    if not marks_data:
+    if marks_df.empty:
         st.warning("No performance data available. Please add some marks first.")
         return
     
@@ -74,222 +79,226 @@ def render_enhanced_analytics():
     ])
     
     with tab1:
-        render_predictive_analytics(enhanced_data)
+        render_predictive_analytics(latest_data)
     
     with tab2:
         render_progress_tracking(enhanced_data)
     
     with tab3:
-        render_risk_identification(enhanced_data)
+        render_risk_identification(latest_data)
     
     with tab4:
         render_comparative_analysis(enhanced_data)
     
     with tab5:
-        render_performance_insights(enhanced_data)
+        render_performance_insights(enhanced_data, latest_data)
 
 
-def prepare_enhanced_analytics_data():
-    """Prepare enhanced analytics data with temporal and predictive features"""
+def get_marks_version() -> Tuple[Optional[int], int]:
+    """Cheap (max id, row count) tag for the mark table, used as the analytics cache key"""
     with get_session() as session:
-        # Get all marks first
-        marks = session.exec(select(Mark)).all()
-        if not marks:
-            return pd.DataFrame()
-        
-        # Get related data
-        students = {s.id: s for s in session.exec(select(Student)).all()}
-        subjects = {s.id: s for s in session.exec(select(Subject)).all()}
-        classes = {c.id: c for c in session.exec(select(Class)).all()}
-        
-        # Convert to DataFrame manually
-        data = []
-        for mark in marks:
-            student = students.get(mark.student_id)
-            subject = subjects.get(mark.subject_id)
-            if student and subject:
-                class_obj = classes.get(student.class_id)
-                
-                if class_obj:  # Only add if all data is available
-                    data.append({
-                        'id': mark.id,
-                        'student_id': mark.student_id,
-                        'subject_id': mark.subject_id,
-                        'score': mark.score,
-                        'term': mark.term,
-                        'first_name': student.first_name,
-                        'last_name': student.last_name,
-                        'class_id': student.class_id,
-                        'aggregate': student.aggregate,
-                        'subject_name': subject.name,
-                        'subject_code': subject.code,
-                        'class_name': class_obj.name
-                    })
-        
-        marks_df = pd.DataFrame(data)
+        max_id, count = session.exec(select(func.max(Mark.id), func.count(Mark.id))).one()
+    return max_id, count
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def prepare_enhanced_analytics_data(marks_version: Optional[Tuple[Optional[int], int]] = None):
+    """Prepare enhanced analytics data with temporal and predictive features
+    
+    Returns (marks_df, latest_df) where latest_df holds each student's last record plus
+    their score statistics, shared by the tabs that work per student. marks_version only
+    keys the cache (see get_marks_version), so frames are reused across reruns and
+    sessions until marks are added or removed, the TTL expires or Refresh is pressed.
+    """
+    with get_session() as session:
+        # One joined query loaded straight into pandas; inner joins keep only marks
+        # whose student, subject and class all exist
+        marks_query = (
+            select(
+                Mark.id, Mark.student_id, Mark.subject_id, Mark.score, Mark.term,
+                Student.first_name, Student.last_name, Student.class_id, Student.aggregate,
+                Subject.name.label('subject_name'), Subject.code.label('subject_code'),
+                Class.name.label('class_name')
+            )
+            .join(Student, Student.id == Mark.student_id)
+            .join(Subject, Subject.id == Mark.subject_id)
+            .join(Class, Class.id == Student.class_id)
+            .order_by(Mark.id)
+        )
+        # Ids fit comfortably in int32; scores stay float64 because they are shown unrounded
+        marks_df = pd.read_sql(marks_query, session.connection(), dtype={
+            'id': 'int32', 'student_id': 'int32', 'subject_id': 'int32', 'class_id': 'int32'
+        })
         
         if marks_df.empty:
-            return pd.DataFrame()
+            return pd.DataFrame(), pd.DataFrame()
+        
+        # Low-cardinality labels repeat on every mark; categorical codes keep them small and fast to group
+        for column in ['class_name', 'subject_name', 'subject_code', 'term']:
+            marks_df[column] = marks_df[column].astype('category')
         
         # Add derived features
         marks_df['student_name'] = marks_df['first_name'] + ' ' + marks_df['last_name']
         
         # Since we don't have timestamps, create synthetic time progression
-        marks_df['record_index'] = marks_df.groupby('student_id').cumcount()
+        marks_df['record_index'] = marks_df.groupby('student_id', sort=False).cumcount().astype('int32')
+        
+        # Sort once by student and record order; everything below and the tabs rely on it
+        marks_df = marks_df.sort_values(['student_id', 'record_index'], kind='mergesort', ignore_index=True)
         
-        # Calculate student-level aggregations
-        student_stats = marks_df.groupby('student_id').agg({
+        # Add trends and predictions based on record order
+        marks_df = add_trend_and_predictions(marks_df)
+        
+        # Student-level aggregations, one row per student indexed by student_id
+        student_stats = marks_df.groupby('student_id', sort=False).agg({
             'score': ['mean', 'std', 'count', 'min', 'max'],
             'term': 'nunique',
             'subject_id': 'nunique'
         }).round(2)
         
         student_stats.columns = [f"{col[0]}_{col[1]}" for col in student_stats.columns]
-        student_stats.reset_index(inplace=True)
-        
-        # Merge student statistics back to main dataframe
-        marks_df = marks_df.merge(student_stats, on='student_id', how='left')
         
-        # Add trends and predictions based on record order
-        marks_df = add_trend_analysis_simple(marks_df)
-        marks_df = add_performance_predictions_simple(marks_df)
-        
-        return marks_df
-
-
-def add_trend_analysis_simple(df: pd.DataFrame) -> pd.DataFrame:
-    """Add trend analysis for each student based on record order"""
-    df_with_trends = df.copy()
-    
-    # Calculate rolling averages and trends
-    df_with_trends = df_with_trends.sort_values(['student_id', 'record_index'])
-    
-    # Group by student and calculate trends
-    trend_data = []
-    
-    for student_id in df_with_trends['student_id'].unique():
-        student_data = df_with_trends[df_with_trends['student_id'] == student_id].copy()
-        
-        if len(student_data) >= 3:  # Need at least 3 points for trend
-            # Calculate rolling average (window of 3)
-            student_data['rolling_avg'] = student_data['score'].rolling(window=3, min_periods=1).mean()
-            
-            # Calculate trend (slope of linear regression)
-            x = student_data['record_index'].values.reshape(-1, 1)
-            y = student_data['score'].values
-            
-            try:
-                if SKLEARN_AVAILABLE and LinearRegression is not None:
-                    model = LinearRegression()
-                    model.fit(x, y)
-                    trend_slope = model.coef_[0]
-                else:
-                    # Simple trend calculation without sklearn
-                    if len(x) >= 2:
-                        trend_slope = (y[-1] - y[0]) / (len(y) - 1)
-                    else:
-                        trend_slope = 0
-                
-                student_data['trend_slope'] = trend_slope
-                student_data['trend_direction'] = np.where(
-                    trend_slope > 0.5, 'Improving',
-                    np.where(trend_slope < -0.5, 'Declining', 'Stable')
-                )
-            except:
-                student_data['trend_slope'] = 0
-                student_data['trend_direction'] = 'Stable'
-        else:
-            student_data['rolling_avg'] = student_data['score']
-            student_data['trend_slope'] = 0
-            student_data['trend_direction'] = 'Insufficient Data'
+        # Frame is sorted by student and record order, so the last duplicate is the latest record.
+        # Only the per-student view carries the statistics, looked up by index rather than merged per mark.
+        latest_df = (
+            marks_df.drop_duplicates('student_id', keep='last')
+            .join(student_stats, on='student_id')
+            .reset_index(drop=True)
+        )
         
-        trend_data.append(student_data)
-    
-    if trend_data:
-        df_with_trends = pd.concat(trend_data, ignore_index=True)
-    
-    return df_with_trends
+        return marks_df, latest_df
 
 
-def add_performance_predictions_simple(df: pd.DataFrame) -> pd.DataFrame:
-    """Add performance predictions for students based on record order"""
-    df_with_predictions = df.copy()
-    
-    prediction_data = []
-    
-    for student_id in df_with_predictions['student_id'].unique():
-        student_data = df_with_predictions[df_with_predictions['student_id'] == student_id].copy()
+def add_trend_and_predictions(df: pd.DataFrame) -> pd.DataFrame:
+    """Add trend analysis and next-score predictions for each student based on record order
+    
+    Expects df sorted by student_id then record_index with a default index; the new
+    columns are added in place and df is returned for chaining.
+    """
+    grouped_scores = df.groupby('student_id', sort=False)['score']
+    counts = grouped_scores.transform('size').to_numpy()
+    
+    # Need at least 3 points for a trend and 4 for a prediction. Students below that keep
+    # these defaults in one shot; only the remaining rows are fitted.
+    has_trend = counts >= 3
+    has_prediction = counts >= 4
+    rolling_avg = df['score'].to_numpy(dtype=float, copy=True)
+    trend_slope = np.zeros(len(df))
+    predicted_next_score = grouped_scores.transform('mean').to_numpy(dtype=float, copy=True)
+    fit_mse = np.full(len(df), np.inf)
+    
+    fitted = df[has_trend]
+    if not fitted.empty:
+        # Rolling average (window of 3) for every fitted student in one pass; the frame is
+        # sorted by student so the grouped result lines up with the fitted rows
+        rolling_avg[has_trend] = (
+            fitted.groupby('student_id', sort=False)['score']
+            .rolling(window=3, min_periods=1).mean().to_numpy()
+        )
         
-        if len(student_data) >= 4:  # Need sufficient data for prediction
-            try:
-                # Prepare features for prediction
-                student_data = student_data.sort_values('record_index')
-                x = student_data['record_index'].values.reshape(-1, 1)
-                y = student_data['score'].values
-                
-                # Simple linear regression for trend prediction
-                if SKLEARN_AVAILABLE and LinearRegression is not None:
-                    model = LinearRegression()
-                    model.fit(x, y)
-                    
-                    # Predict next score
-                    next_x = np.array([[student_data['record_index'].max() + 1]])
-                    predicted_score = model.predict(next_x)[0]
-                else:
-                    # Simple prediction without sklearn
-                    if len(y) >= 2:
-                        recent_trend = (y[-1] - y[-2]) if len(y) >= 2 else 0
-                        predicted_score = y[-1] + recent_trend
-                    else:
-                        predicted_score = y[-1] if len(y) > 0 else 50
-                
-                # Bound prediction between 0 and 100
-                predicted_score = max(0, min(100, predicted_score))
-                
-                student_data['predicted_next_score'] = predicted_score
-                student_data['prediction_confidence'] = calculate_prediction_confidence(y, model.predict(x))
-                
-            except:
-                student_data['predicted_next_score'] = student_data['score'].mean()
-                student_data['prediction_confidence'] = 'Low'
-        else:
-            student_data['predicted_next_score'] = student_data['score'].mean()
-            student_data['prediction_confidence'] = 'Insufficient Data'
+        # Grouped sums give the closed-form least-squares fit and its error for every student at once
+        x = fitted['record_index'].to_numpy(dtype=float)
+        y = fitted['score'].to_numpy(dtype=float)
+        sums = pd.DataFrame({
+            'student_id': fitted['student_id'],
+            'x': x, 'y': y, 'xy': x * y, 'xx': x * x, 'yy': y * y
+        }).groupby('student_id', sort=False).agg(
+            n=('y', 'size'), sx=('x', 'sum'), sy=('y', 'sum'), sxy=('xy', 'sum'),
+            sxx=('xx', 'sum'), syy=('yy', 'sum'), max_x=('x', 'max')
+        )
+        n = sums['n'].to_numpy(dtype=float)
+        sx, sy, sxy, sxx, syy = (sums[col].to_numpy() for col in ['sx', 'sy', 'sxy', 'sxx', 'syy'])
+        denominator = n * sxx - sx ** 2
+        slope = np.divide(n * sxy - sx * sy, denominator, out=np.zeros(len(sums)), where=denominator != 0)
+        intercept = (sy - slope * sx) / n
+        mse = (
+            syy / n - 2 * (intercept * sy + slope * sxy) / n
+            + intercept ** 2 + 2 * intercept * slope * sx / n + slope ** 2 * sxx / n
+        )
         
-        prediction_data.append(student_data)
-    
-    if prediction_data:
-        df_with_predictions = pd.concat(prediction_data, ignore_index=True)
-    
-    return df_with_predictions
+        per_student = pd.DataFrame({
+            'slope': slope,
+            'predicted': np.clip(intercept + slope * (sums['max_x'].to_numpy() + 1), 0, 100),
+            'mse': mse
+        }, index=sums.index).reindex(fitted['student_id'])
+        
+        trend_slope[has_trend] = per_student['slope'].to_numpy()
+        predictable = counts[has_trend] >= 4
+        predicted_next_score[has_prediction] = per_student['predicted'].to_numpy()[predictable]
+        fit_mse[has_prediction] = per_student['mse'].to_numpy()[predictable]
+    
+    df['rolling_avg'] = rolling_avg
+    df['trend_slope'] = trend_slope
+    df['trend_direction'] = pd.Categorical(
+        np.select(
+            [~has_trend, trend_slope > 0.5, trend_slope < -0.5],
+            ['Insufficient Data', 'Improving', 'Declining'],
+            default='Stable'
+        ),
+        categories=TREND_DIRECTIONS
+    )
+    
+    # Confidence follows the fit's mean squared error
+    df['predicted_next_score'] = predicted_next_score
+    df['prediction_confidence'] = pd.Categorical(
+        np.select(
+            [~has_prediction, fit_mse < 25, fit_mse < 100],
+            ['Insufficient Data', 'High', 'Medium'],
+            default='Low'
+        ),
+        categories=PREDICTION_CONFIDENCES
+    )
+    
+    return df
 
 
-def calculate_prediction_confidence(actual: np.ndarray, predicted: np.ndarray) -> str:
-    """Calculate confidence level of predictions"""
-    if len(actual) < 3:
-        return 'Low'
-    
-    mse = np.mean((actual - predicted) ** 2)
+@st.cache_data(show_spinner=False, max_entries=4)
+def _predictive_figures(latest_predictions: pd.DataFrame):
+    """Build the prediction scatter and trend pie; cached so filter changes reuse them"""
+    # Performance prediction scatter plot
+    prediction_fig = px.scatter(
+        latest_predictions,
+        x='score',
+        y='predicted_next_score',
+        color='trend_direction',
+        hover_data=['student_name', 'prediction_confidence'],
+        title="Current vs Predicted Performance",
+        labels={'score': 'Current Average Score', 'predicted_next_score': 'Predicted Next Score'}
+    )
+    
+    # Add diagonal line for reference
+    prediction_fig.add_shape(
+        type="line",
+        x0=0, y0=0, x1=100, y1=100,
+        line=dict(dash="dash", color="gray")
+    )
+    
+    # Trend distribution
+    trend_counts = latest_predictions['trend_direction'].value_counts()
+    trend_counts = trend_counts[trend_counts > 0]
+    trend_fig = px.pie(
+        values=trend_counts.values,
+        names=trend_counts.index,
+        title="Student Performance Trends",
+        color_discrete_map={
+            'Improving': 'green',
+            'Declining': 'red',
+            'Stable': 'blue',
+            'Insufficient Data': 'gray'
+        }
+    )
     
-    if mse < 25:  # Very low error
-        return 'High'
-    elif mse < 100:  # Moderate error
-        return 'Medium'
-    else:
-        return 'Low'
+    return prediction_fig, trend_fig
 
 
-def render_predictive_analytics(df: pd.DataFrame):
-    """Render predictive analytics dashboard"""
+def render_predictive_analytics(latest_predictions: pd.DataFrame):
+    """Render predictive analytics dashboard from each student's latest record"""
     st.header("🔮 Predictive Analytics")
     
-    if df.empty:
+    if latest_predictions.empty:
         st.info("No data available for predictive analytics")
         return
     
-    # Get latest predictions for each student
-    latest_predictions = df.groupby('student_id').last().reset_index()
-    
     # Summary metrics
     col1, col2, col3, col4 = st.columns(4)
     
@@ -314,42 +323,13 @@ def render_predictive_analytics(df: pd.DataFrame):
     # Predictive charts
     col1, col2 = st.columns(2)
     
+    prediction_fig, trend_fig = _predictive_figures(latest_predictions)
+    
     with col1:
-        # Performance prediction scatter plot
-        fig = px.scatter(
-            latest_predictions,
-            x='score',
-            y='predicted_next_score',
-            color='trend_direction',
-            hover_data=['student_name', 'prediction_confidence'],
-            title="Current vs Predicted Performance",
-            labels={'score': 'Current Average Score', 'predicted_next_score': 'Predicted Next Score'}
-        )
-        
-        # Add diagonal line for reference
-        fig.add_shape(
-            type="line",
-            x0=0, y0=0, x1=100, y1=100,
-            line=dict(dash="dash", color="gray")
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(prediction_fig, use_container_width=True)
     
     with col2:
-        # Trend distribution
-        trend_counts = latest_predictions['trend_direction'].value_counts()
-        fig = px.pie(
-            values=trend_counts.values,
-            names=trend_counts.index,
-            title="Student Performance Trends",
-            color_discrete_map={
-                'Improving': 'green',
-                'Declining': 'red',
-                'Stable': 'blue',
-                'Insufficient Data': 'gray'
-            }
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(trend_fig, use_container_width=True)
     
     st.divider()
     
@@ -370,8 +350,8 @@ def render_predictive_analytics(df: pd.DataFrame):
             options=['All'] + list(latest_predictions['prediction_confidence'].unique())
         )
     
-    # Apply filters
-    filtered_predictions = latest_predictions.copy()
+    # Apply filters; boolean indexing already returns new frames
+    filtered_predictions = latest_predictions
     if selected_trend != 'All':
         filtered_predictions = filtered_predictions[filtered_predictions['trend_direction'] == selected_trend]
     if selected_confidence != 'All':
@@ -382,9 +362,7 @@ def render_predictive_analytics(df: pd.DataFrame):
                    'trend_direction', 'prediction_confidence']
     
     if not filtered_predictions.empty:
-        predictions_table = filtered_predictions[display_cols].copy()
-        predictions_table['score'] = predictions_table['score'].round(1)
-        predictions_table['predicted_next_score'] = predictions_table['predicted_next_score'].round(1)
+        predictions_table = filtered_predictions[display_cols].round({'score': 1, 'predicted_next_score': 1})
         predictions_table = predictions_table.rename(columns={
             'student_name': 'Student',
             'class_name': 'Class',
@@ -399,6 +377,26 @@ def render_predictive_analytics(df: pd.DataFrame):
         st.info("No predictions match the selected filters.")
 
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def _class_term_figure(df: pd.DataFrame):
+    """Average class score per term as a line chart, or None when there is nothing to plot"""
+    class_term_progress = df.groupby(['class_name', 'term'], observed=True).agg({
+        'score': 'mean'
+    }).reset_index()
+    
+    if class_term_progress.empty:
+        return None
+    
+    return px.line(
+        class_term_progress,
+        x='term',
+        y='score',
+        color='class_name',
+        title="Average Class Performance by Term",
+        labels={'score': 'Average Score (%)', 'term': 'Term'}
+    )
+
+
 def render_progress_tracking(df: pd.DataFrame):
     """Render progress tracking dashboard"""
     st.header("📈 Progress Tracking")
@@ -412,7 +410,8 @@ def render_progress_tracking(df: pd.DataFrame):
     selected_student = st.selectbox("Select Student for Detailed Progress", students)
     
     if selected_student:
-        student_data = df[df['student_name'] == selected_student].sort_values('record_index')
+        # The frame is already in record order per student
+        student_data = df[df['student_name'] == selected_student]
         
         col1, col2 = st.columns([3, 1])
         
@@ -464,7 +463,7 @@ def render_progress_tracking(df: pd.DataFrame):
         # Subject-wise progress
         st.subheader(f"Subject-wise Progress - {selected_student}")
         
-        subject_progress = student_data.groupby('subject_name').agg({
+        subject_progress = student_data.groupby('subject_name', observed=True).agg({
             'score': ['mean', 'count', 'first', 'last']
         }).round(1)
         
@@ -478,80 +477,55 @@ def render_progress_tracking(df: pd.DataFrame):
     # Class progress comparison by term
     st.subheader("🏫 Class Progress by Term")
     
-    class_term_progress = df.groupby(['class_name', 'term']).agg({
-        'score': 'mean'
-    }).reset_index()
-    
-    if not class_term_progress.empty:
-        fig = px.line(
-            class_term_progress,
-            x='term',
-            y='score',
-            color='class_name',
-            title="Average Class Performance by Term",
-            labels={'score': 'Average Score (%)', 'term': 'Term'}
-        )
-        
+    fig = _class_term_figure(df)
+    if fig is not None:
         st.plotly_chart(fig, use_container_width=True)
 
 
-def render_risk_identification(df: pd.DataFrame):
-    """Render risk identification dashboard"""
+def _describe_risk_flags(flags: pd.Series) -> List[str]:
+    """Expand risk-factor bitmasks into comma-separated labels for display"""
+    return [
+        ', '.join(label for (label, _), bit in zip(RISK_FACTORS, RISK_FACTOR_BITS) if flag & bit)
+        for flag in flags
+    ]
+
+
+def render_risk_identification(latest_data: pd.DataFrame):
+    """Render risk identification dashboard from each student's latest record"""
     st.header("⚠️ Risk Identification")
     
-    if df.empty:
+    if latest_data.empty:
         st.info("No data available for risk analysis")
         return
     
-    # Calculate risk factors
-    latest_data = df.groupby('student_id').last().reset_index()
-    
-    # Define risk criteria
-    at_risk_students = []
-    warning_students = []
-    
-    for _, student in latest_data.iterrows():
-        risk_score = 0
-        risk_factors = []
-        
-        # Low performance risk
-        if student['score'] < 50:
-            risk_score += 3
-            risk_factors.append("Low performance (<50%)")
-        elif student['score'] < 65:
-            risk_score += 1
-            risk_factors.append("Below average performance")
-        
-        # Declining trend risk
-        if student.get('trend_direction') == 'Declining':
-            risk_score += 2
-            risk_factors.append("Declining trend")
-        
-        # Low assessment count risk (check if column exists)
-        score_count = student.get('score_count', 0)
-        if score_count and score_count < 3:
-            risk_score += 1
-            risk_factors.append("Insufficient assessments")
-        
-        # Consistency risk (high standard deviation)
-        score_std = student.get('score_std', 0)
-        if score_std and score_std > 20:
-            risk_score += 1
-            risk_factors.append("Inconsistent performance")
-        
-        student_info = {
-            'student_name': student['student_name'],
-            'class_name': student['class_name'],
-            'current_score': student['score'],
-            'trend': student.get('trend_direction', 'Unknown'),
-            'risk_score': risk_score,
-            'risk_factors': risk_factors
-        }
-        
-        if risk_score >= 4:
-            at_risk_students.append(student_info)
-        elif risk_score >= 2:
-            warning_students.append(student_info)
+    # Risk criteria in RISK_FACTORS order, one boolean column per factor
+    score = latest_data['score']
+    score_count = latest_data['score_count']
+    factor_hits = np.column_stack([
+        score < 50,
+        (score >= 50) & (score < 65),
+        latest_data['trend_direction'].eq('Declining'),
+        (score_count > 0) & (score_count < 3),
+        latest_data['score_std'] > 20
+    ])
+    risk_score = factor_hits.astype(int) @ np.array([weight for _, weight in RISK_FACTORS])
+    # One bit per factor; labels are only expanded for the flagged students shown below
+    risk_flags = (factor_hits.astype(np.int8) @ RISK_FACTOR_BITS).astype(np.int8)
+    
+    risk_df = pd.DataFrame({
+        'student_name': latest_data['student_name'],
+        'class_name': latest_data['class_name'],
+        'current_score': score,
+        'trend': latest_data['trend_direction'],
+        'risk_score': risk_score,
+        'risk_flags': risk_flags
+    })
+    high_risk_mask = risk_score >= 4
+    warning_mask = (risk_score >= 2) & ~high_risk_mask
+    at_risk_students = risk_df[high_risk_mask].reset_index(drop=True)
+    warning_students = risk_df[warning_mask].reset_index(drop=True)
+    for flagged in (at_risk_students, warning_students):
+        flagged['risk_factors_str'] = _describe_risk_flags(flagged['risk_flags'])
     
     # Display risk summary
     col1, col2, col3 = st.columns(3)
@@ -593,13 +567,15 @@ def render_risk_identification(df: pd.DataFrame):
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
-        # Risk factors frequency
-        all_factors = []
-        for student in at_risk_students + warning_students:
-            all_factors.extend(student['risk_factors'])
+        # Risk factors frequency among flagged students
+        flagged_flags = risk_flags[high_risk_mask | warning_mask]
+        factor_counts = pd.Series(
+            [np.count_nonzero(flagged_flags & bit) for bit in RISK_FACTOR_BITS],
+            index=[label for label, _ in RISK_FACTORS]
+        )
+        factor_counts = factor_counts[factor_counts > 0].sort_values(ascending=False, kind='stable')
         
-        if all_factors:
-            factor_counts = pd.Series(all_factors).value_counts()
+        if not factor_counts.empty:
             
             fig = px.bar(
                 x=factor_counts.index,
@@ -613,14 +589,11 @@ def render_risk_identification(df: pd.DataFrame):
     # Detailed risk tables
     st.divider()
     
-    if at_risk_students:
+    if not at_risk_students.empty:
         st.subheader("🔴 High Risk Students")
         st.error("These students require immediate attention and intervention")
         
-        risk_df = pd.DataFrame(at_risk_students)
-        risk_df['risk_factors_str'] = risk_df['risk_factors'].apply(lambda x: ', '.join(x))
-        
-        display_risk = risk_df[['student_name', 'class_name', 'current_score', 'trend', 'risk_factors_str']].copy()
+        display_risk = at_risk_students[['student_name', 'class_name', 'current_score', 'trend', 'risk_factors_str']]
         display_risk = display_risk.rename(columns={
             'student_name': 'Student',
             'class_name': 'Class',
@@ -631,14 +604,11 @@ def render_risk_identification(df: pd.DataFrame):
         
         st.dataframe(display_risk, use_container_width=True)
     
-    if warning_students:
+    if not warning_students.empty:
         st.subheader("🟡 Warning Students")
         st.warning("These students need monitoring and support")
         
-        warning_df = pd.DataFrame(warning_students)
-        warning_df['risk_factors_str'] = warning_df['risk_factors'].apply(lambda x: ', '.join(x))
-        
-        display_warning = warning_df[['student_name', 'class_name', 'current_score', 'trend', 'risk_factors_str']].copy()
+        display_warning = warning_students[['student_name', 'class_name', 'current_score', 'trend', 'risk_factors_str']]
         display_warning = display_warning.rename(columns={
             'student_name': 'Student',
             'class_name': 'Class',
@@ -650,6 +620,88 @@ def render_risk_identification(df: pd.DataFrame):
         st.dataframe(display_warning, use_container_width=True)
 
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def _comparative_figures(df: pd.DataFrame):
+    """Build the class and subject comparison charts; cached so reruns reuse them"""
+    class_stats = df.groupby('class_name', observed=True).agg({
+        'score': ['mean', 'std', 'count'],
+        'student_id': 'nunique'
+    }).round(2)
+    
+    class_stats.columns = ['Avg_Score', 'Std_Dev', 'Total_Assessments', 'Total_Students']
+    class_stats = class_stats.reset_index()
+    
+    # Class performance radar chart; each class's four radial values as one row
+    radar_values = np.column_stack([
+        class_stats['Avg_Score'],
+        100 - class_stats['Std_Dev'],  # Invert std_dev (lower is better)
+        np.minimum(class_stats['Total_Assessments'] * 10, 100),  # Scale assessments
+        np.minimum(class_stats['Total_Students'] * 5, 100)  # Scale students
+    ])
+    radar_fig = go.Figure([
+        go.Scatterpolar(
+            r=r_values,
+            theta=['Avg Performance', 'Consistency', 'Assessment Activity', 'Class Size'],
+            fill='toself',
+            name=class_name
+        )
+        for class_name, r_values in zip(class_stats['class_name'], radar_values)
+    ])
+    
+    radar_fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 100]
+            )
+        ),
+        title="Class Performance Comparison"
+    )
+    
+    # Class ranking
+    class_ranking = class_stats.sort_values('Avg_Score', ascending=False)
+    class_ranking = class_ranking.assign(Rank=range(1, len(class_ranking) + 1))
+    
+    class_rank_fig = px.bar(
+        class_ranking,
+        x='class_name',
+        y='Avg_Score',
+        title="Class Performance Ranking",
+        text='Rank',
+        labels={'class_name': 'Class', 'Avg_Score': 'Average Score (%)'}
+    )
+    class_rank_fig.update_traces(textposition='outside')
+    
+    subject_stats = df.groupby('subject_name', observed=True, sort=False).agg({
+        'score': ['mean', 'std', 'count'],
+        'student_id': 'nunique'
+    }).round(2)
+    
+    subject_stats.columns = ['Avg_Score', 'Std_Dev', 'Total_Assessments', 'Total_Students']
+    subject_stats = subject_stats.reset_index().sort_values('Avg_Score', ascending=False)
+    
+    subject_rank_fig = px.bar(
+        subject_stats,
+        x='subject_name',
+        y='Avg_Score',
+        title="Subject Performance Ranking",
+        labels={'subject_name': 'Subject', 'Avg_Score': 'Average Score (%)'}
+    )
+    subject_rank_fig.update_layout(xaxis_tickangle=45)
+    
+    subject_scatter_fig = px.scatter(
+        subject_stats,
+        x='Avg_Score',
+        y='Std_Dev',
+        size='Total_Students',
+        hover_data=['subject_name', 'Total_Assessments'],
+        title="Subject Performance vs Consistency",
+        labels={'Avg_Score': 'Average Score (%)', 'Std_Dev': 'Standard Deviation'}
+    )
+    
+    return radar_fig, class_rank_fig, subject_rank_fig, subject_scatter_fig
+
+
 def render_comparative_analysis(df: pd.DataFrame):
     """Render comparative analysis dashboard"""
     st.header("🔍 Comparative Analysis")
@@ -658,104 +710,62 @@ def render_comparative_analysis(df: pd.DataFrame):
         st.info("No data available for comparative analysis")
         return
     
+    radar_fig, class_rank_fig, subject_rank_fig, subject_scatter_fig = _comparative_figures(df)
+    
     # Class comparison
     st.subheader("🏫 Class Performance Comparison")
     
-    class_stats = df.groupby('class_name').agg({
-        'score': ['mean', 'std', 'count'],
-        'student_id': 'nunique'
-    }).round(2)
-    
-    class_stats.columns = ['Avg_Score', 'Std_Dev', 'Total_Assessments', 'Total_Students']
-    class_stats = class_stats.reset_index()
-    
     col1, col2 = st.columns(2)
     
     with col1:
-        # Class performance radar chart
-        fig = go.Figure()
-        
-        for class_name in class_stats['class_name']:
-            class_data = class_stats[class_stats['class_name'] == class_name].iloc[0]
-            
-            fig.add_trace(go.Scatterpolar(
-                r=[
-                    class_data['Avg_Score'],
-                    100 - class_data['Std_Dev'],  # Invert std_dev (lower is better)
-                    min(class_data['Total_Assessments'] * 10, 100),  # Scale assessments
-                    min(class_data['Total_Students'] * 5, 100)  # Scale students
-                ],
-                theta=['Avg Performance', 'Consistency', 'Assessment Activity', 'Class Size'],
-                fill='toself',
-                name=class_name
-            ))
-        
-        fig.update_layout(
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 100]
-                )
-            ),
-            title="Class Performance Comparison"
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(radar_fig, use_container_width=True)
     
     with col2:
-        # Class ranking
-        class_ranking = class_stats.sort_values('Avg_Score', ascending=False).copy()
-        class_ranking['Rank'] = range(1, len(class_ranking) + 1)
-        
-        fig = px.bar(
-            class_ranking,
-            x='class_name',
-            y='Avg_Score',
-            title="Class Performance Ranking",
-            text='Rank',
-            labels={'class_name': 'Class', 'Avg_Score': 'Average Score (%)'}
-        )
-        fig.update_traces(textposition='outside')
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(class_rank_fig, use_container_width=True)
     
     # Subject comparison
     st.subheader("📚 Subject Performance Comparison")
     
-    subject_stats = df.groupby('subject_name').agg({
-        'score': ['mean', 'std', 'count'],
-        'student_id': 'nunique'
-    }).round(2)
-    
-    subject_stats.columns = ['Avg_Score', 'Std_Dev', 'Total_Assessments', 'Total_Students']
-    subject_stats = subject_stats.reset_index().sort_values('Avg_Score', ascending=False)
-    
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.bar(
-            subject_stats,
-            x='subject_name',
-            y='Avg_Score',
-            title="Subject Performance Ranking",
-            labels={'subject_name': 'Subject', 'Avg_Score': 'Average Score (%)'}
-        )
-        fig.update_layout(xaxis_tickangle=45)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(subject_rank_fig, use_container_width=True)
     
     with col2:
-        fig = px.scatter(
-            subject_stats,
-            x='Avg_Score',
-            y='Std_Dev',
-            size='Total_Students',
-            hover_data=['subject_name', 'Total_Assessments'],
-            title="Subject Performance vs Consistency",
-            labels={'Avg_Score': 'Average Score (%)', 'Std_Dev': 'Standard Deviation'}
+        st.plotly_chart(subject_scatter_fig, use_container_width=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _distribution_figures(df: pd.DataFrame):
+    """Build the score histogram and per-term bar chart (None without a term column)"""
+    # Score distribution
+    distribution_fig = px.histogram(
+        df,
+        x='score',
+        nbins=20,
+        title="Overall Score Distribution",
+        labels={'score': 'Score (%)', 'count': 'Number of Assessments'}
+    )
+    distribution_fig.add_vline(x=df['score'].mean(), line_dash="dash", line_color="red", 
+                               annotation_text=f"Mean: {df['score'].mean():.1f}%")
+    
+    # Performance by time of day (if we had that data)
+    # For now, let's show performance by term
+    term_fig = None
+    if 'term' in df.columns:
+        term_performance = df.groupby('term', observed=True, sort=False)['score'].mean().sort_values(ascending=False)
+        
+        term_fig = px.bar(
+            x=term_performance.index,
+            y=term_performance.values,
+            title="Performance by Term",
+            labels={'x': 'Term', 'y': 'Average Score (%)'}
         )
-        st.plotly_chart(fig, use_container_width=True)
+    
+    return distribution_fig, term_fig
 
 
-def render_performance_insights(df: pd.DataFrame):
+def render_performance_insights(df: pd.DataFrame, latest_data: pd.DataFrame):
     """Render performance insights dashboard"""
     st.header("🎯 Performance Insights")
     
@@ -766,7 +776,7 @@ def render_performance_insights(df: pd.DataFrame):
     # Key insights
     st.subheader("💡 Key Insights")
     
-    insights = generate_performance_insights(df)
+    insights = generate_performance_insights(df, latest_data)
     
     for insight in insights:
         if insight['type'] == 'success':
@@ -781,70 +791,30 @@ def render_performance_insights(df: pd.DataFrame):
     # Performance distribution analysis
     col1, col2 = st.columns(2)
     
+    distribution_fig, term_fig = _distribution_figures(df)
+    
     with col1:
-        # Score distribution
-        fig = px.histogram(
-            df,
-            x='score',
-            nbins=20,
-            title="Overall Score Distribution",
-            labels={'score': 'Score (%)', 'count': 'Number of Assessments'}
-        )
-        fig.add_vline(x=df['score'].mean(), line_dash="dash", line_color="red", 
-                     annotation_text=f"Mean: {df['score'].mean():.1f}%")
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(distribution_fig, use_container_width=True)
     
     with col2:
-        # Performance by time of day (if we had that data)
-        # For now, let's show performance by term
-        if 'term' in df.columns:
-            term_performance = df.groupby('term')['score'].mean().sort_values(ascending=False)
-            
-            fig = px.bar(
-                x=term_performance.index,
-                y=term_performance.values,
-                title="Performance by Term",
-                labels={'x': 'Term', 'y': 'Average Score (%)'}
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        if term_fig is not None:
+            st.plotly_chart(term_fig, use_container_width=True)
     
     # Correlation analysis
     st.subheader("📊 Performance Correlations")
     
-    # Calculate correlations between different metrics
-    student_metrics = df.groupby('student_id').agg({
-        'score': ['mean', 'std', 'count'],
-        'subject_id': 'nunique'
-    }).round(2)
-    
-    student_metrics.columns = ['avg_score', 'score_std', 'assessment_count', 'subject_count']
-    
-    if len(student_metrics) > 1:
-        correlation_matrix = student_metrics.corr()
-        
-        fig = px.imshow(
-            correlation_matrix,
-            title="Student Metrics Correlation Matrix",
-            labels=dict(color="Correlation"),
-            aspect="auto"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    # Too few students give meaningless coefficients; skip the work and the heatmap payload
+    if len(latest_data) < MIN_CORRELATION_STUDENTS:
+        st.info(f"Need at least {MIN_CORRELATION_STUDENTS} students with marks for meaningful correlations")
+    else:
+        fig, strong_correlations = _metric_correlations(latest_data)
+        if fig is None:
+            st.info("Not enough variance across metrics for correlation")
+            return
+        st.plotly_chart(fig, use_container_width=True, key="metrics_correlation_heatmap")
         
         # Interpretation
         st.write("**Correlation Insights:**")
-        strong_correlations = []
-        
-        for i in range(len(correlation_matrix.columns)):
-            for j in range(i+1, len(correlation_matrix.columns)):
-                try:
-                    corr_value = correlation_matrix.iloc[i, j]
-                    if pd.notna(corr_value) and isinstance(corr_value, (int, float)) and abs(corr_value) > 0.5:
-                        col1_name = correlation_matrix.columns[i]
-                        col2_name = correlation_matrix.columns[j]
-                        strong_correlations.append(f"**{col1_name}** and **{col2_name}**: {corr_value:.2f}")
-                except (TypeError, ValueError):
-                    continue  # Skip invalid correlation values
-        
         if strong_correlations:
             for corr in strong_correlations:
                 st.write(f"• {corr}")
@@ -852,8 +822,67 @@ def render_performance_insights(df: pd.DataFrame):
             st.write("• No strong correlations found between metrics")
 
 
-def generate_performance_insights(df: pd.DataFrame) -> List[Dict]:
-    """Generate automated insights from the data"""
+@st.cache_data(show_spinner=False, max_entries=8)
+def _metric_correlations(latest_data: pd.DataFrame) -> Tuple[Optional[go.Figure], List[str]]:
+    """Heatmap of the per-student metrics correlation matrix and the strongly correlated pairs, formatted
+    
+    Metrics that do not vary are left out; the figure is None when fewer than two remain.
+    """
+    # Per-student stats ride along on the latest record
+    student_metrics = latest_data[['score_mean', 'score_std', 'score_count', 'subject_id_nunique']].set_axis(
+        ['avg_score', 'score_std', 'assessment_count', 'subject_count'], axis=1
+    )
+    
+    metric_values = student_metrics.to_numpy(dtype=np.float64)
+    varying = np.nanstd(metric_values, axis=0) > 1e-12
+    if varying.sum() < 2:
+        return None, []
+    student_metrics = student_metrics.loc[:, varying]
+    metric_values = metric_values[:, varying]
+    
+    if np.isnan(metric_values).any():
+        # pandas drops missing values pair by pair (e.g. no spread for single-mark students)
+        correlation_matrix = student_metrics.corr()
+    else:
+        # Every remaining metric varies, so all coefficients are finite
+        correlation_matrix = pd.DataFrame(
+            np.corrcoef(metric_values, rowvar=False),
+            index=student_metrics.columns,
+            columns=student_metrics.columns
+        )
+    
+    # Upper triangle only (each pair once); NaN left by pairwise deletion is skipped
+    upper_rows, upper_cols = np.triu_indices(len(correlation_matrix.columns), k=1)
+    pair_values = correlation_matrix.to_numpy()[upper_rows, upper_cols]
+    strong = np.isfinite(pair_values) & (np.abs(pair_values) > 0.5)
+    metric_names = correlation_matrix.columns.to_numpy()
+    strong_correlations = [
+        f"**{col1_name}** and **{col2_name}**: {corr_value:.2f}"
+        for col1_name, col2_name, corr_value in zip(
+            metric_names[upper_rows[strong]], metric_names[upper_cols[strong]], pair_values[strong]
+        )
+    ]
+    
+    fig = px.imshow(
+        correlation_matrix,
+        title="Student Metrics Correlation Matrix",
+        labels=dict(color="Correlation"),
+        aspect="auto"
+    )
+    
+    return fig, strong_correlations
+
+
+def _best_and_worst(averages: pd.Series) -> Tuple:
+    """(best label, best value, worst label, worst value) of a series of averages"""
+    values = averages.to_numpy()
+    best, worst = values.argmax(), values.argmin()
+    return averages.index[best], values[best], averages.index[worst], values[worst]
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def generate_performance_insights(df: pd.DataFrame, latest_data: pd.DataFrame) -> List[Dict]:
+    """Generate automated insights from the data; cached on the frames' contents"""
     insights = []
     
     # Overall performance insight
@@ -875,10 +904,11 @@ def generate_performance_insights(df: pd.DataFrame) -> List[Dict]:
         })
     
     # Trend insights
-    if 'trend_direction' in df.columns:
-        latest_trends = df.groupby('student_id')['trend_direction'].last()
-        improving_pct = (latest_trends == 'Improving').mean() * 100
-        declining_pct = (latest_trends == 'Declining').mean() * 100
+    if 'trend_direction' in latest_data.columns:
+        # One pass over the latest records gives every trend's share
+        trend_shares = latest_data['trend_direction'].value_counts(normalize=True)
+        improving_pct = trend_shares.get('Improving', 0) * 100
+        declining_pct = trend_shares.get('Declining', 0) * 100
         
         if improving_pct > declining_pct:
             insights.append({
@@ -892,24 +922,22 @@ def generate_performance_insights(df: pd.DataFrame) -> List[Dict]:
             })
     
     # Class performance insights
-    class_performance = df.groupby('class_name')['score'].mean()
-    best_class = class_performance.idxmax()
-    worst_class = class_performance.idxmin()
+    class_performance = df.groupby('class_name', observed=True, sort=False)['score'].mean()
+    best_class, best_class_score, worst_class, worst_class_score = _best_and_worst(class_performance)
     
-    if class_performance.max() - class_performance.min() > 15:
+    if best_class_score - worst_class_score > 15:
         insights.append({
             'type': 'warning',
-            'message': f"Significant performance gap between classes: {best_class} ({class_performance.max():.1f}%) vs {worst_class} ({class_performance.min():.1f}%)"
+            'message': f"Significant performance gap between classes: {best_class} ({best_class_score:.1f}%) vs {worst_class} ({worst_class_score:.1f}%)"
         })
     
     # Subject performance insights
-    subject_performance = df.groupby('subject_name')['score'].mean()
-    best_subject = subject_performance.idxmax()
-    worst_subject = subject_performance.idxmin()
+    subject_performance = df.groupby('subject_name', observed=True, sort=False)['score'].mean()
+    best_subject, best_subject_score, worst_subject, worst_subject_score = _best_and_worst(subject_performance)
     
     insights.append({
         'type': 'info',
-        'message': f"Strongest subject: {best_subject} ({subject_performance.max():.1f}%), Weakest: {worst_subject} ({subject_performance.min():.1f}%)"
+        'message': f"Strongest subject: {best_subject} ({best_subject_score:.1f}%), Weakest: {worst_subject} ({worst_subject_score:.1f}%)"
     })
     
     return insights
\ No newline at end of file
@@ -1,82 +1,216 @@
+from collections import defaultdict
 import streamlit as st
 import pandas as pd
+import numpy as np
 from services.db import get_session, Student, Subject, Mark, Class, User, TeacherClass, update_student_aggregate, update_all_student_aggregates, calculate_student_aggregate, calculate_student_aggregate_detailed, calculate_grade, get_grade_description, validate_score, validate_and_normalize_score
 from utils.rbac import get_user_accessible_students, get_current_user, require_permission, has_permission
 from sqlmodel import select, text
 import io
+import os
 import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, KeepTogether
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from datetime import datetime
 
 
+# PDF styles are built once at import and shared by every report generator
+_STYLES = getSampleStyleSheet()
+
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=20,
+    alignment=1,  # Center alignment
+)
+
+_CLASS_TITLE_STYLE = ParagraphStyle(
+    'ClassTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=16,
+    spaceAfter=15,
+    alignment=1,
+    textColor=colors.darkblue
+)
+
+_SUBTITLE_STYLE = ParagraphStyle(
+    'ClassSubtitle',
+    parent=_STYLES['Heading2'],
+    fontSize=14,
+    spaceAfter=12,
+    alignment=1,
+    textColor=colors.darkgreen
+)
+
+_SECTION_STYLE = ParagraphStyle(
+    'SectionHeader',
+    parent=_STYLES['Heading3'],
+    fontSize=12,
+    spaceAfter=8,
+    textColor=colors.darkred
+)
+
+_STUDENT_NAME_STYLE = ParagraphStyle(
+    'StudentName',
+    parent=_STYLES['Heading3'],
+    fontSize=11,
+    textColor=colors.darkblue,
+    spaceAfter=5
+)
+
+_STUDENT_TITLE_STYLE = ParagraphStyle(
+    'StudentTitle',
+    parent=_STYLES['Title'],
+    fontSize=16,
+    spaceAfter=15,
+    alignment=1,
+    textColor=colors.darkblue
+)
+
+_HEADER_STYLE = ParagraphStyle(
+    'SectionHeader',
+    parent=_STYLES['Heading2'],
+    fontSize=14,
+    spaceAfter=10,
+    textColor=colors.darkgreen,
+    backColor=colors.lightgrey
+)
+
+_MAIN_TITLE_STYLE = ParagraphStyle(
+    'MainTitle',
+    parent=_STYLES['Title'],
+    fontSize=18,
+    spaceAfter=20,
+    alignment=1,
+    textColor=colors.darkblue
+)
+
+_BULK_CLASS_TITLE_STYLE = ParagraphStyle(
+    'ClassTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=16,
+    spaceAfter=15,
+    textColor=colors.darkgreen
+)
+
+_TABLE_STYLE_STUDENT_LIST = TableStyle([
+    # Header styling
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+
+    # Data styling
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+
+    # Alternating row colors
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightgrey, colors.white]),
+])
+
+_TABLE_STYLE_STATS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightgrey, colors.white]),
+])
+
+_TABLE_STYLE_MARKS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lightgrey]),
+    ('BACKGROUND', (-1, -1), (-1, -1), colors.lightyellow),  # Highlight aggregate
+])
+
+_TABLE_STYLE_STUDENT_REPORT = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightblue),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+_TABLE_STYLE_BULK = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightgrey, colors.white]),
+])
+
+# Excel header styles, shared by every header cell
+_XLSX_HEADER_FONT = Font(bold=True, color="FFFFFFFF")
+_XLSX_HEADER_FILL = PatternFill(start_color="FF366092", end_color="FF366092", fill_type="solid")
+_XLSX_CENTER = Alignment(horizontal="center")
+_XLSX_HEADER_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'),
+                             top=Side(style='thin'), bottom=Side(style='thin'))
+
+
 def generate_student_pdf(filtered_df):
     """Generate PDF report for students"""
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     story = []
     
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=20,
-        alignment=1,  # Center alignment
-    )
-    
     # Add title
-    title = Paragraph("Student List Report", title_style)
+    title = Paragraph("Student List Report", _TITLE_STYLE)
     story.append(title)
     story.append(Spacer(1, 20))
     
     # Add generation info
     generated_text = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-    generated_para = Paragraph(generated_text, styles['Normal'])
+    generated_para = Paragraph(generated_text, _STYLES['Normal'])
     story.append(generated_para)
     story.append(Spacer(1, 10))
     
     total_text = f"Total Students: {len(filtered_df)}"
-    total_para = Paragraph(total_text, styles['Normal'])
+    total_para = Paragraph(total_text, _STYLES['Normal'])
     story.append(total_para)
     story.append(Spacer(1, 20))
     
     # Prepare table data
     table_data = [['Student Name', 'Class', 'Aggregate Score']]  # Header
-    
-    for _, row in filtered_df.iterrows():
-        table_data.append([
-            str(row['Full Name']),
-            str(row['Class']),
-            str(row['Aggregate'])
-        ])
+    table_data += filtered_df[['Full Name', 'Class', 'Aggregate']].astype(str).to_numpy().tolist()
     
     # Create table
     table = Table(table_data, colWidths=[3*inch, 2.5*inch, 1.5*inch])
     
     # Style the table
-    table.setStyle(TableStyle([
-        # Header styling
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        
-        # Data styling
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        
-        # Alternating row colors
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightgrey, colors.white]),
-    ]))
+    table.setStyle(_TABLE_STYLE_STUDENT_LIST)
     
     story.append(table)
     
@@ -86,64 +220,45 @@ def generate_student_pdf(filtered_df):
     return buffer
 
 
+def _xlsx_header_row(ws, headers):
+    """Build a styled header row of write-only cells"""
+    row = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = _XLSX_HEADER_FONT
+        cell.fill = _XLSX_HEADER_FILL
+        cell.alignment = _XLSX_CENTER
+        cell.border = _XLSX_HEADER_BORDER
+        row.append(cell)
+    return row
+
+
 def generate_student_excel(filtered_df):
     """Generate Excel report for students"""
     buffer = io.BytesIO()
+    workbook = Workbook(write_only=True)
     
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        # Prepare data for Excel (clean version)
-        excel_df = filtered_df[['Full Name', 'Class', 'Aggregate']].copy()
-        excel_df.columns = ['Student Name', 'Class', 'Aggregate Score']
-        
-        # Write to Excel
-        excel_df.to_excel(writer, sheet_name='Student List', index=False)
-        
-        # Get the workbook and worksheet
-        workbook = writer.book
-        worksheet = writer.sheets['Student List']
-        
-        # Add some formatting
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
-        # Header formatting
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        
-        for cell in worksheet[1]:  # First row (headers)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Adjust column widths
-        worksheet.column_dimensions['A'].width = 25  # Student Name
-        worksheet.column_dimensions['B'].width = 20  # Class
-        worksheet.column_dimensions['C'].width = 15  # Aggregate Score
-        
-        # Add a summary sheet
-        summary_df = pd.DataFrame({
-            'Report Information': [
-                'Generated on',
-                'Total Students',
-                'Report Type'
-            ],
-            'Value': [
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                len(filtered_df),
-                'Student List Export'
-            ]
-        })
-        
-        summary_df.to_excel(writer, sheet_name='Summary', index=False)
-        
-        # Format summary sheet
-        summary_ws = writer.sheets['Summary']
-        for cell in summary_ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-        
-        summary_ws.column_dimensions['A'].width = 20
-        summary_ws.column_dimensions['B'].width = 25
+    # Student list sheet (column widths must be set before rows are written)
+    worksheet = workbook.create_sheet('Student List')
+    worksheet.column_dimensions['A'].width = 25  # Student Name
+    worksheet.column_dimensions['B'].width = 20  # Class
+    worksheet.column_dimensions['C'].width = 15  # Aggregate Score
+    
+    worksheet.append(_xlsx_header_row(worksheet, ['Student Name', 'Class', 'Aggregate Score']))
+    for row in filtered_df[['Full Name', 'Class', 'Aggregate']].itertuples(index=False, name=None):
+        worksheet.append(row)
+    
+    # Summary sheet
+    summary_ws = workbook.create_sheet('Summary')
+    summary_ws.column_dimensions['A'].width = 20
+    summary_ws.column_dimensions['B'].width = 25
+    
+    summary_ws.append(_xlsx_header_row(summary_ws, ['Report Information', 'Value']))
+    summary_ws.append(['Generated on', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
+    summary_ws.append(['Total Students', len(filtered_df)])
+    summary_ws.append(['Report Type', 'Student List Export'])
     
+    workbook.save(buffer)
     buffer.seek(0)
     return buffer
 
@@ -154,41 +269,11 @@ def generate_class_detailed_report(class_obj, students_in_class, term="Term 3",
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
     story = []
     
-    # Styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'ClassTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=15,
-        alignment=1,  # Center alignment
-        textColor=colors.darkblue
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'ClassSubtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        alignment=1,
-        textColor=colors.darkgreen
-    )
-    
-    section_style = ParagraphStyle(
-        'SectionHeader',
-        parent=styles['Heading3'],
-        fontSize=12,
-        spaceAfter=8,
-        textColor=colors.darkred
-    )
-    
     # Class header
-    title = Paragraph(f"Detailed Academic Report - {class_obj.name}", title_style)
+    title = Paragraph(f"Detailed Academic Report - {class_obj.name}", _CLASS_TITLE_STYLE)
     story.append(title)
     
-    subtitle = Paragraph(f"Category: {class_obj.category} | {term} - {exam_type}", subtitle_style)
+    subtitle = Paragraph(f"Category: {class_obj.category} | {term} - {exam_type}", _SUBTITLE_STYLE)
     story.append(subtitle)
     story.append(Spacer(1, 15))
     
@@ -200,12 +285,12 @@ def generate_class_detailed_report(class_obj, students_in_class, term="Term 3",
     ]
     
     for meta in metadata:
-        para = Paragraph(meta, styles['Normal'])
+        para = Paragraph(meta, _STYLES['Normal'])
         story.append(para)
     story.append(Spacer(1, 20))
     
     # Class summary statistics
-    story.append(Paragraph("📊 Class Performance Summary", section_style))
+    story.append(Paragraph("📊 Class Performance Summary", _SECTION_STYLE))
     
     # Calculate class statistics
     aggregates = [s.aggregate for s in students_in_class if s.aggregate is not None]
@@ -223,51 +308,48 @@ def generate_class_detailed_report(class_obj, students_in_class, term="Term 3",
         ]
         
         stats_table = Table(stats_data, colWidths=[3*inch, 2*inch])
-        stats_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightgrey, colors.white]),
-        ]))
+        stats_table.setStyle(_TABLE_STYLE_STATS)
         
         story.append(stats_table)
         story.append(Spacer(1, 20))
     
     # Individual student reports
-    story.append(Paragraph("👥 Individual Student Performance", section_style))
+    story.append(Paragraph("👥 Individual Student Performance", _SECTION_STYLE))
     story.append(Spacer(1, 10))
     
+    # Get the whole class's marks for the specified term and exam type in one query
+    marks_by_student = defaultdict(list)
+    student_ids = [student.id for student in students_in_class]
+    if student_ids:
+        with get_session() as s:
+            class_marks = s.exec(
+                select(Mark, Subject)
+                .join(Subject, Subject.id == Mark.subject_id)
+                .where(
+                    Mark.student_id.in_(student_ids),
+                    Mark.term == term,
+                    Mark.exam_type == exam_type
+                ).order_by(Mark.student_id, Subject.name)
+            ).all()
+        for mark, subject in class_marks:
+            marks_by_student[mark.student_id].append((mark, subject))
+    
     for idx, student in enumerate(students_in_class):
         # Student header
         student_title = f"{student.first_name} {student.last_name}"
         if student.aggregate:
             student_title += f" (Aggregate: {student.aggregate:.1f}%)"
         
-        student_para = Paragraph(student_title, ParagraphStyle(
-            'StudentName', parent=styles['Heading3'], fontSize=11, 
-            textColor=colors.darkblue, spaceAfter=5
-        ))
+        student_para = Paragraph(student_title, _STUDENT_NAME_STYLE)
         
-        # Get student's marks for the specified term and exam type
-        with get_session() as s:
-            student_marks = s.exec(
-                select(Mark, Subject).join(Subject).where(
-                    Mark.student_id == student.id,
-                    Mark.term == term,
-                    Mark.exam_type == exam_type
-                ).order_by(Subject.name)
-            ).all()
+        student_marks = marks_by_student.get(student.id, [])
         
         if student_marks:
             # Create marks table
             marks_data = [['Subject', 'Score (%)', 'Grade', 'Description']]
             
             core_total = 0
+            core_count = 0
             elective_scores = []
             
             for mark, subject in student_marks:
@@ -282,11 +364,12 @@ def generate_class_detailed_report(class_obj, students_in_class, term="Term 3",
                 # Track for aggregate calculation display
                 if subject.subject_type == 'core':
                     core_total += mark.score
+                    core_count += 1
                 else:
                     elective_scores.append(mark.score)
             
             # Add aggregate calculation if applicable
-            if len([m for m, s in student_marks if s.subject_type == 'core']) >= 4 and len(elective_scores) >= 2:
+            if core_count >= 4 and len(elective_scores) >= 2:
                 best_electives = sorted(elective_scores, reverse=True)[:2]
                 calculated_aggregate = core_total + sum(best_electives)
                 marks_data.append(['', '', '', ''])  # Separator
@@ -295,25 +378,14 @@ def generate_class_detailed_report(class_obj, students_in_class, term="Term 3",
             
             # Style and add marks table
             marks_table = Table(marks_data, colWidths=[2*inch, 1*inch, 0.8*inch, 1.7*inch])
-            marks_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lightgrey]),
-                ('BACKGROUND', (-1, -1), (-1, -1), colors.lightyellow),  # Highlight aggregate
-            ]))
+            marks_table.setStyle(_TABLE_STYLE_MARKS)
             
             # Keep student data together
             student_content = [student_para, Spacer(1, 5), marks_table]
             story.append(KeepTogether(student_content))
         else:
             # No marks found
-            no_marks = Paragraph("No marks recorded for this term/exam type", styles['Normal'])
+            no_marks = Paragraph("No marks recorded for this term/exam type", _STYLES['Normal'])
             student_content = [student_para, Spacer(1, 5), no_marks]
             story.append(KeepTogether(student_content))
         
@@ -336,34 +408,13 @@ def generate_individual_student_report(student_obj, term="Term 3", exam_type="En
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
     story = []
     
-    # Styles
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'StudentTitle',
-        parent=styles['Title'],
-        fontSize=16,
-        spaceAfter=15,
-        alignment=1,
-        textColor=colors.darkblue
-    )
-    
-    header_style = ParagraphStyle(
-        'SectionHeader',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=10,
-        textColor=colors.darkgreen,
-        backColor=colors.lightgrey
-    )
-    
     # Get student class information
     with get_session() as session:
         class_obj = session.get(Class, student_obj.class_id)
         class_name = class_obj.name if class_obj else "Unknown Class"
         
         # Student header
-        title = Paragraph(f"Academic Report - {student_obj.first_name} {student_obj.last_name}", title_style)
+        title = Paragraph(f"Academic Report - {student_obj.first_name} {student_obj.last_name}", _STUDENT_TITLE_STYLE)
         story.append(title)
         
         # Student information
@@ -375,7 +426,7 @@ def generate_individual_student_report(student_obj, term="Term 3", exam_type="En
         ]
         
         for info in student_info:
-            story.append(Paragraph(info, styles['Normal']))
+            story.append(Paragraph(info, _STYLES['Normal']))
         
         story.append(Spacer(1, 20))
         
@@ -390,7 +441,7 @@ def generate_individual_student_report(student_obj, term="Term 3", exam_type="En
         
         if marks:
             # Subjects and marks table
-            story.append(Paragraph("📚 Subject Marks & Grades", header_style))
+            story.append(Paragraph("📚 Subject Marks & Grades", _HEADER_STYLE))
             
             # Table headers
             table_data = [["Subject", "Code", "Score (%)", "Grade", "Description"]]
@@ -398,8 +449,18 @@ def generate_individual_student_report(student_obj, term="Term 3", exam_type="En
             total_score = 0
             total_subjects = 0
             
+            # Subject breakdown by type, collected in the same pass as the table
+            core_subjects = []
+            elective_subjects = []
+            
+            subject_ids = {mark.subject_id for mark in marks}
+            subject_map = {
+                subject.id: subject
+                for subject in session.exec(select(Subject).where(Subject.id.in_(subject_ids))).all()
+            }
+            
             for mark in marks:
-                subject = session.get(Subject, mark.subject_id)
+                subject = subject_map.get(mark.subject_id)
                 if subject:
                     grade_desc = get_grade_description(mark.grade) if mark.grade else "Not calculated"
                     table_data.append([
@@ -411,6 +472,11 @@ def generate_individual_student_report(student_obj, term="Term 3", exam_type="En
                     ])
                     total_score += mark.score
                     total_subjects += 1
+                    
+                    if subject.subject_type == 'core':
+                        core_subjects.append((subject.name, mark.score, mark.grade))
+                    else:
+                        elective_subjects.append((subject.name, mark.score, mark.grade))
             
             # Add summary row
             average_score = total_score / total_subjects if total_subjects > 0 else 0
@@ -424,33 +490,22 @@ def generate_individual_student_report(student_obj, term="Term 3", exam_type="En
             
             # Create and style the table
             table = Table(table_data, colWidths=[2*inch, 1*inch, 1*inch, 0.8*inch, 1.5*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightblue),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            table.setStyle(_TABLE_STYLE_STUDENT_REPORT)
             
             story.append(table)
             story.append(Spacer(1, 20))
             
             # Performance Analysis
-            story.append(Paragraph("📊 Performance Analysis", header_style))
+            story.append(Paragraph("📊 Performance Analysis", _HEADER_STYLE))
             
             # Calculate aggregate if possible
             aggregate = calculate_student_aggregate(student_obj.id, term, exam_type)
             if aggregate is not None:
-                story.append(Paragraph(f"<b>Aggregate Score:</b> {aggregate:.1f}/600", styles['Normal']))
+                story.append(Paragraph(f"<b>Aggregate Score:</b> {aggregate:.1f}/600", _STYLES['Normal']))
                 percentage = (aggregate / 600) * 100
-                story.append(Paragraph(f"<b>Aggregate Percentage:</b> {percentage:.1f}%", styles['Normal']))
+                story.append(Paragraph(f"<b>Aggregate Percentage:</b> {percentage:.1f}%", _STYLES['Normal']))
             else:
-                story.append(Paragraph("<b>Aggregate Score:</b> Cannot be calculated (insufficient marks)", styles['Normal']))
+                story.append(Paragraph("<b>Aggregate Score:</b> Cannot be calculated (insufficient marks)", _STYLES['Normal']))
             
             story.append(Spacer(1, 10))
             
@@ -471,39 +526,27 @@ def generate_individual_student_report(student_obj, term="Term 3", exam_type="En
                 performance_level = "Needs Improvement"
                 color = "red"
             
-            story.append(Paragraph(f"<b>Overall Performance Level:</b> <font color='{color}'>{performance_level}</font>", styles['Normal']))
-            
-            # Subject breakdown by type
-            core_subjects = []
-            elective_subjects = []
-            
-            for mark in marks:
-                subject = session.get(Subject, mark.subject_id)
-                if subject:
-                    if subject.subject_type == 'core':
-                        core_subjects.append((subject.name, mark.score, mark.grade))
-                    else:
-                        elective_subjects.append((subject.name, mark.score, mark.grade))
+            story.append(Paragraph(f"<b>Overall Performance Level:</b> <font color='{color}'>{performance_level}</font>", _STYLES['Normal']))
             
             if core_subjects:
                 story.append(Spacer(1, 15))
-                story.append(Paragraph("🎯 Core Subjects Performance", header_style))
+                story.append(Paragraph("🎯 Core Subjects Performance", _HEADER_STYLE))
                 core_avg = sum([score for _, score, _ in core_subjects]) / len(core_subjects)
-                story.append(Paragraph(f"<b>Core Subjects Average:</b> {core_avg:.1f}%", styles['Normal']))
+                story.append(Paragraph(f"<b>Core Subjects Average:</b> {core_avg:.1f}%", _STYLES['Normal']))
                 
                 for subject_name, score, grade in core_subjects:
-                    story.append(Paragraph(f"• {subject_name}: {score:.1f}% (Grade {grade})", styles['Normal']))
+                    story.append(Paragraph(f"• {subject_name}: {score:.1f}% (Grade {grade})", _STYLES['Normal']))
             
             if elective_subjects:
                 story.append(Spacer(1, 15))
-                story.append(Paragraph("🎨 Elective Subjects Performance", header_style))
+                story.append(Paragraph("🎨 Elective Subjects Performance", _HEADER_STYLE))
                 elective_avg = sum([score for _, score, _ in elective_subjects]) / len(elective_subjects)
-                story.append(Paragraph(f"<b>Elective Subjects Average:</b> {elective_avg:.1f}%", styles['Normal']))
+                story.append(Paragraph(f"<b>Elective Subjects Average:</b> {elective_avg:.1f}%", _STYLES['Normal']))
                 
                 for subject_name, score, grade in elective_subjects:
-                    story.append(Paragraph(f"• {subject_name}: {score:.1f}% (Grade {grade})", styles['Normal']))
+                    story.append(Paragraph(f"• {subject_name}: {score:.1f}% (Grade {grade})", _STYLES['Normal']))
         else:
-            story.append(Paragraph("No marks found for this student in the specified term and exam type.", styles['Normal']))
+            story.append(Paragraph("No marks found for this student in the specified term and exam type.", _STYLES['Normal']))
     
     # Build PDF
     doc.build(story)
@@ -511,37 +554,118 @@ def generate_individual_student_report(student_obj, term="Term 3", exam_type="En
     return buffer
 
 
+# Reports take roughly 10-15 ms each and starting the workers about 2 s, so smaller
+# exports are built serially and only a large multi-class export uses the pool.
+# These timings come from a single-CPU host; re-tune on the deployment machine.
+_PDF_POOL_MIN_JOBS = 200
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool():
+    """Return the shared report worker pool, starting it on first use"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                # Start workers from a fresh interpreter; forking the threaded Streamlit server can deadlock
+                start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                _pdf_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                mp_context=multiprocessing.get_context(start_method))
+    return _pdf_pool
+
+
+def _discard_pdf_pool(pool):
+    """Forget a broken worker pool so the next request starts a new one"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _build_student_pdf(job):
+    """Build one student's report in a worker process and return the PDF bytes"""
+    student_id, term, exam_type = job
+    with get_session() as session:
+        student = session.get(Student, student_id)
+    return generate_individual_student_report(student, term, exam_type).getvalue()
+
+
 def generate_individual_student_pdfs(selected_classes, term="Term 3", exam_type="End of Term"):
     """Generate separate PDF files for each student in the selected classes"""
     student_pdfs = {}
     
-    with get_session() as session:
-        for class_obj in selected_classes:
-            # Get all students in this class
-            students_in_class = session.exec(
-                select(Student).where(Student.class_id == class_obj.id).order_by(Student.first_name, Student.last_name)
+    # Get all students of the selected classes in one query, grouped by class
+    students_by_class = defaultdict(list)
+    class_ids = [class_obj.id for class_obj in selected_classes]
+    if class_ids:
+        with get_session() as session:
+            class_students = session.exec(
+                select(Student)
+                .where(Student.class_id.in_(class_ids))
+                .order_by(Student.class_id, Student.first_name, Student.last_name)
             ).all()
-            
-            for student in students_in_class:
+        for student in class_students:
+            students_by_class[student.class_id].append(student)
+    
+    jobs = [
+        (class_obj, student)
+        for class_obj in selected_classes
+        for student in students_by_class[class_obj.id]
+    ]
+    if not jobs:
+        return student_pdfs
+    
+    # Large exports spread the CPU-bound ReportLab builds over the shared worker pool.
+    # Workers only receive plain ids and load the student through their own session.
+    pool = None
+    futures = None
+    if len(jobs) >= _PDF_POOL_MIN_JOBS and (os.cpu_count() or 1) > 1:
+        pool = _get_pdf_pool()
+        try:
+            futures = [
+                pool.submit(_build_student_pdf, (student.id, term, exam_type))
+                for _, student in jobs
+            ]
+        except BrokenProcessPool:
+            _discard_pdf_pool(pool)
+            futures = None
+    
+    failed_students = []
+    for index, (class_obj, student) in enumerate(jobs):
+        try:
+            # Generate individual student report
+            pdf_buffer = None
+            if futures is not None:
                 try:
-                    # Generate individual student report
-                    pdf_buffer = generate_individual_student_report(student, term, exam_type)
-                    
-                    # Create filename with student name
-                    filename = f"{student.first_name}_{student.last_name}_{class_obj.name}_{term}_{exam_type}.pdf"
-                    # Clean filename from special characters
-                    filename = "".join(c for c in filename if c.isalnum() or c in "._- ").strip()
-                    filename = filename.replace(" ", "_")
-                    
-                    student_pdfs[filename] = {
-                        'buffer': pdf_buffer,
-                        'student': student,
-                        'class': class_obj,
-                        'display_name': f"{student.first_name} {student.last_name} ({class_obj.name})"
-                    }
-                except Exception as e:
-                    # Log error but continue with other students
-                    print(f"Error generating PDF for {student.first_name} {student.last_name}: {str(e)}")
+                    pdf_buffer = io.BytesIO(futures[index].result())
+                except BrokenProcessPool:
+                    # A worker died; drop the pool once and build the remaining reports here
+                    _discard_pdf_pool(pool)
+                    futures = None
+            if pdf_buffer is None:
+                pdf_buffer = generate_individual_student_report(student, term, exam_type)
+            
+            # Create filename with student name
+            filename = f"{student.first_name}_{student.last_name}_{class_obj.name}_{term}_{exam_type}.pdf"
+            # Clean filename from special characters
+            filename = "".join(c for c in filename if c.isalnum() or c in "._- ").strip()
+            filename = filename.replace(" ", "_")
+            
+            student_pdfs[filename] = {
+                'buffer': pdf_buffer,
+                'student': student,
+                'class': class_obj,
+                'display_name': f"{student.first_name} {student.last_name} ({class_obj.name})"
+            }
+        except Exception as e:
+            # Keep going with the other students and report the failures together
+            failed_students.append(f"{student.first_name} {student.last_name} ({e})")
+    
+    if failed_students:
+        st.warning(f"Could not generate {len(failed_students)} report(s): " + "; ".join(failed_students))
     
     return student_pdfs
 
@@ -552,28 +676,25 @@ def generate_bulk_class_reports(selected_classes, term="Term 3", exam_type="End
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
     story = []
     
-    # Styles
-    styles = getSampleStyleSheet()
-    
-    main_title_style = ParagraphStyle(
-        'MainTitle',
-        parent=styles['Title'],
-        fontSize=18,
-        spaceAfter=20,
-        alignment=1,
-        textColor=colors.darkblue
-    )
-    
     # Main report title
-    title = Paragraph(f"Bulk Academic Reports - {term} ({exam_type})", main_title_style)
+    title = Paragraph(f"Bulk Academic Reports - {term} ({exam_type})", _MAIN_TITLE_STYLE)
     story.append(title)
     
+    # Load the students of every selected class in one query, grouped by class
+    students_by_class = defaultdict(list)
+    class_ids = [class_obj.id for class_obj in selected_classes]
+    if class_ids:
+        with get_session() as s:
+            class_students = s.exec(
+                select(Student)
+                .where(Student.class_id.in_(class_ids))
+                .order_by(Student.class_id, Student.first_name, Student.last_name)
+            ).all()
+        for student in class_students:
+            students_by_class[student.class_id].append(student)
+    
     # Summary information
-    total_students = 0
-    with get_session() as s:
-        for class_obj in selected_classes:
-            students_count = len(s.exec(select(Student).where(Student.class_id == class_obj.id)).all())
-            total_students += students_count
+    total_students = sum(len(students_by_class[class_id]) for class_id in class_ids)
     
     summary_info = [
         f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
@@ -583,7 +704,7 @@ def generate_bulk_class_reports(selected_classes, term="Term 3", exam_type="End
     ]
     
     for info in summary_info:
-        para = Paragraph(info, styles['Normal'])
+        para = Paragraph(info, _STYLES['Normal'])
         story.append(para)
     
     story.append(Spacer(1, 20))
@@ -591,20 +712,11 @@ def generate_bulk_class_reports(selected_classes, term="Term 3", exam_type="End
     
     # Generate report for each class
     for idx, class_obj in enumerate(selected_classes):
-        with get_session() as s:
-            students_in_class = s.exec(
-                select(Student).where(Student.class_id == class_obj.id).order_by(Student.first_name, Student.last_name)
-            ).all()
+        students_in_class = students_by_class[class_obj.id]
         
         if students_in_class:
-            # Add class report content (reuse the single class function logic)
-            class_buffer = generate_class_detailed_report(class_obj, students_in_class, term, exam_type)
-            
-            # Parse the existing buffer content and add to main story
-            # For now, we'll create a simple class section
-            class_title = Paragraph(f"Class: {class_obj.name} ({class_obj.category})", 
-                                   ParagraphStyle('ClassTitle', parent=styles['Heading1'], 
-                                                fontSize=16, spaceAfter=15, textColor=colors.darkgreen))
+            # Simple class section for the combined report
+            class_title = Paragraph(f"Class: {class_obj.name} ({class_obj.category})", _BULK_CLASS_TITLE_STYLE)
             story.append(class_title)
             
             # Add class summary
@@ -614,48 +726,32 @@ def generate_bulk_class_reports(selected_classes, term="Term 3", exam_type="End
                 avg_aggregate = sum(aggregates) / len(aggregates)
                 summary_text += f" | Average Aggregate: {avg_aggregate:.1f}%"
             
-            story.append(Paragraph(summary_text, styles['Normal']))
+            story.append(Paragraph(summary_text, _STYLES['Normal']))
             story.append(Spacer(1, 10))
             
             # Simple student list for bulk report
             if students_in_class:
-                student_data = [['Student Name', 'Aggregate Score', 'Performance Level']]
+                names = [f"{student.first_name} {student.last_name}" for student in students_in_class]
+                aggs = np.array(
+                    [student.aggregate if student.aggregate is not None else np.nan for student in students_in_class],
+                    dtype=float
+                )
                 
-                for student in students_in_class:
-                    if student.aggregate:
-                        if student.aggregate >= 80:
-                            performance = "Excellent"
-                        elif student.aggregate >= 60:
-                            performance = "Good"
-                        elif student.aggregate >= 40:
-                            performance = "Average"
-                        else:
-                            performance = "Needs Support"
-                        
-                        student_data.append([
-                            f"{student.first_name} {student.last_name}",
-                            f"{student.aggregate:.1f}%",
-                            performance
-                        ])
-                    else:
-                        student_data.append([
-                            f"{student.first_name} {student.last_name}",
-                            "Not calculated",
-                            "Pending"
-                        ])
+                # Missing or zero aggregates are reported as pending
+                pending = np.isnan(aggs) | (aggs == 0)
+                with np.errstate(invalid='ignore'):
+                    tiers = np.select(
+                        [pending, aggs >= 80, aggs >= 60, aggs >= 40],
+                        ["Pending", "Excellent", "Good", "Average"],
+                        default="Needs Support"
+                    )
+                agg_strs = np.where(pending, "Not calculated", np.char.mod("%.1f%%", aggs))
+                
+                student_data = [['Student Name', 'Aggregate Score', 'Performance Level']]
+                student_data += [list(row) for row in zip(names, agg_strs.tolist(), tiers.tolist())]
                 
                 student_table = Table(student_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
-                student_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 9),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightgrey, colors.white]),
-                ]))
+                student_table.setStyle(_TABLE_STYLE_BULK)
                 
                 story.append(student_table)
         
@@ -708,9 +804,11 @@ def display_students():
             return
         else:  # Limited access to specific students
             # Filter students by accessible IDs
-            all_students = session.exec(select(Student)).all()
-            students = [s for s in all_students if s.id in accessible_student_ids]
-            students.sort(key=lambda x: (x.last_name, x.first_name))
+            students = session.exec(
+                select(Student)
+                .where(Student.id.in_(accessible_student_ids))
+                .order_by(Student.last_name, Student.first_name)
+            ).all()
         
         # Get all classes for mapping
         classes = session.exec(select(Class)).all()
@@ -990,6 +1088,7 @@ def display_students():
                                             student_to_update.aggregate = new_aggregate
                                             session.add(student_to_update)
                                             session.commit()
+                                            get_user_accessible_students.clear()
                                             st.success(f"✅ Updated {new_first_name} {new_last_name}")
                                             del st.session_state[f"editing_student_{student_obj.id}"]
                                             time.sleep(1)
@@ -1038,6 +1137,7 @@ def display_students():
                                     if student_to_delete:
                                         session.delete(student_to_delete)
                                         session.commit()
+                                        get_user_accessible_students.clear()
                                         st.success(f"✅ Deleted {student_obj.first_name} {student_obj.last_name} and {len(marks_to_delete)} marks")
                                         del st.session_state[f"confirm_delete_{student_obj.id}"]
                                         time.sleep(1)
@@ -1207,6 +1307,7 @@ def display_students():
                                     
                                     # Commit all changes
                                     session.commit()
+                                    get_user_accessible_students.clear()
                                     
                                     # Clear session state
                                     for key in list(st.session_state.keys()):
@@ -1525,6 +1626,7 @@ def display_students():
                                 if student_to_delete:
                                     session.delete(student_to_delete)
                                     session.commit()
+                                    get_user_accessible_students.clear()
                                     
                                     st.success(f"✅ Successfully deleted {selected_student.first_name} {selected_student.last_name} and {len(marks_to_delete)} associated marks.")
                                     st.balloons()
@@ -1643,6 +1745,7 @@ def student_form():
                 )
                 session.add(student)
                 session.commit()
+                get_user_accessible_students.clear()
                 st.success(f"Student {first} {last} saved to {selected_class.name}")
                 st.rerun()
         elif submitted:
@@ -1938,6 +2041,7 @@ def bulk_upload_students(df, class_name_to_id):
         # Commit all successful additions
         try:
             session.commit()
+            get_user_accessible_students.clear()
         except Exception as e:
             session.rollback()
             results['errors'].append(f"Database error: {str(e)}")
@@ -1,6 +1,8 @@
 from __future__ import annotations
+import threading
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Session, create_engine, select
+from sqlalchemy import UniqueConstraint
 from datetime import datetime, timedelta
 
 class User(SQLModel, table=True):
@@ -33,7 +35,10 @@ class Teacher(SQLModel, table=True):
     subject_specialization: Optional[str] = None
 
 class Class(SQLModel, table=True):
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        UniqueConstraint("name", "category", name="uq_class_name_cat"),
+        {'extend_existing': True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     category: str  # "Lower Primary", "Upper Primary", "JHS"
@@ -159,7 +164,6 @@ class Curriculum(SQLModel, table=True):
     class_id: int  # Foreign key to Class
     academic_year_id: int  # Foreign key to AcademicYear
     description: Optional[str] = None
-    learning_objectives: str  # JSON string of objectives
     total_lessons: int
     duration_weeks: int
     created_by: int  # User ID who created the curriculum
@@ -315,12 +319,17 @@ class ReportShare(SQLModel, table=True):
 
 
 _engine = None
+_engine_lock = threading.Lock()
 
 def get_engine(db_url: str = "sqlite:///students.db"):
     global _engine
     if _engine is None:
-        _engine = create_engine(db_url, echo=False)
-        SQLModel.metadata.create_all(_engine)
+        # Streamlit serves each session on its own thread; build the pooled engine once
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(db_url, echo=False, pool_pre_ping=True)
+                SQLModel.metadata.create_all(engine)
+                _engine = engine
     return _engine
 
 def get_session():
@@ -7,7 +7,8 @@ import streamlit as st
 import bcrypt
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Set, Tuple
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 from services.db import get_session, User, Role, Teacher, TeacherClass, Class
 from sqlmodel import select
 
@@ -200,14 +201,18 @@ def authenticate_user(username: str, password: str) -> Optional[Dict]:
             }
     return None
 
+@lru_cache(maxsize=None)
+def _role_permission_set(role: str) -> FrozenSet[str]:
+    """Build the permission set for a role once; ROLE_PERMISSIONS is static"""
+    return frozenset(ROLE_PERMISSIONS.get(role, []))
+
 def get_user_permissions(role: str) -> Set[str]:
     """Get all permissions for a given role"""
-    return set(ROLE_PERMISSIONS.get(role, []))
+    return set(_role_permission_set(role))
 
 def has_permission(user_role: str, permission: str) -> bool:
     """Check if a user role has a specific permission"""
-    user_permissions = get_user_permissions(user_role)
-    return permission in user_permissions
+    return permission in _role_permission_set(user_role)
 
 def require_permission(permission: str):
     """Decorator to require a specific permission for a function"""
@@ -390,6 +395,7 @@ def assign_teacher_to_classes(user_id: int, class_ids: List[int]) -> bool:
                 session.add(teacher_class)
             
             session.commit()
+            get_user_accessible_students.clear()
             return True
         except Exception as e:
             session.rollback()
@@ -407,6 +413,7 @@ def is_teacher_assigned_to_class(user_id: int, class_id: int) -> bool:
         ).first()
         return assignment is not None
 
+@st.cache_data(ttl=300, show_spinner=False)
 def get_user_accessible_students(user_id: int, role: str) -> List[int]:
     """Get list of student IDs accessible to a user based on their role and class assignments
     Returns:
@@ -414,6 +421,9 @@ def get_user_accessible_students(user_id: int, role: str) -> List[int]:
     - [-1]: Teacher with no class assignments - no access
     - [-2]: Teacher with class assignments but no students in those classes
     - [student_ids]: Teacher with specific students they can access
+    
+    Cached for five minutes; call get_user_accessible_students.clear() after
+    changing class assignments or adding, moving or removing students.
     """
     if role in {'Admin', 'Head'}:
         # Admin and Head can access all students
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test the worker pool used for individual student PDF reports
+
+Covers building a report through the shared pool and recovering when a
+worker dies part-way through an export.
+"""
+
+import sys
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.append('src')
+
+import pytest
+from sqlmodel import select
+from services.db import get_session, Student, Class, Mark, Subject
+from components import forms
+
+
+@pytest.fixture
+def sample_class():
+    """Add a class with three marked students and remove it afterwards"""
+    with get_session() as session:
+        class_obj = Class(name="Pool Test Class", category="JHS")
+        subject = Subject(name="Pool Test Subject", code="PTS", category="JHS", subject_type="core")
+        session.add(class_obj)
+        session.add(subject)
+        session.commit()
+        students = [Student(first_name=f"Pool{n}", last_name="Tester", class_id=class_obj.id) for n in range(3)]
+        session.add_all(students)
+        session.commit()
+        marks = [
+            Mark(student_id=student.id, subject_id=subject.id, term="Term 3", score=70 + n, exam_type="End of Term")
+            for n, student in enumerate(students)
+        ]
+        session.add_all(marks)
+        session.commit()
+        session.refresh(class_obj)
+        rows = [(Mark, mark.id) for mark in marks] + [(Student, student.id) for student in students]
+        rows += [(Subject, subject.id), (Class, class_obj.id)]
+
+    yield class_obj
+
+    with get_session() as session:
+        for model, row_id in rows:
+            session.delete(session.get(model, row_id))
+        session.commit()
+
+
+def test_build_student_pdf_in_pool(sample_class):
+    """A worker process loads the student itself and returns the PDF bytes"""
+    with get_session() as session:
+        student_id = session.exec(select(Student.id).where(Student.class_id == sample_class.id)).first()
+
+    pool = forms._get_pdf_pool()
+    try:
+        pdf_bytes = pool.submit(forms._build_student_pdf, (student_id, "Term 3", "End of Term")).result(timeout=120)
+    finally:
+        forms._discard_pdf_pool(pool)
+
+    assert pdf_bytes.startswith(b"%PDF")
+    assert forms._pdf_pool is None
+
+
+class _DyingPool:
+    """Stand-in pool whose worker dies after the first report"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.shutdown_calls = 0
+
+    def submit(self, fn, job):
+        future = Future()
+        if self.submitted == 0:
+            future.set_result(fn(job))
+        else:
+            future.set_exception(BrokenProcessPool("worker died"))
+        self.submitted += 1
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdown_calls += 1
+
+
+def test_broken_pool_falls_back_to_serial(sample_class, monkeypatch):
+    """Reports after a worker death are built serially and the pool is dropped once"""
+    dying_pool = _DyingPool()
+    monkeypatch.setattr(forms, "_pdf_pool", dying_pool)
+    monkeypatch.setattr(forms, "_PDF_POOL_MIN_JOBS", 1)
+    monkeypatch.setattr(forms.os, "cpu_count", lambda: 4)
+
+    student_pdfs = forms.generate_individual_student_pdfs([sample_class])
+
+    assert len(student_pdfs) == 3
+    assert all(entry['buffer'].getvalue().startswith(b"%PDF") for entry in student_pdfs.values())
+    assert dying_pool.shutdown_calls == 1
+    assert forms._pdf_pool is None